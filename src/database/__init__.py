@@ -14,7 +14,9 @@ from sqlalchemy import (
     UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.mutable import MutableList
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.orm import (
     sessionmaker,
     mapped_column,
@@ -23,6 +25,7 @@ from sqlalchemy.orm import (
     MappedAsDataclass,
 )
 
+from database.pool_telemetry import PoolTelemetry, timed_pool, pool_status
 from models import DowntimeModel, CampaignModel
 from utils import getLogger
 
@@ -33,10 +36,38 @@ class Base(DeclarativeBase, MappedAsDataclass):
     pass
 
 
-database_url = f"postgresql://postgres:{os.environ['POSTGRES_PASSWORD']}@{os.getenv('POSTGRES_HOSTNAME', 'oronder-db')}:5432/postgres"
-engine = create_engine(database_url)
+_database_location = f"postgres:{os.environ['POSTGRES_PASSWORD']}@{os.getenv('POSTGRES_HOSTNAME', 'oronder-db')}:5432/postgres"
+database_url = f"postgresql://{_database_location}"
+async_database_url = f"postgresql+asyncpg://{_database_location}"
+
+pool_options = dict(
+    pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+    max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", 20)),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower()
+    in ["true", "1", "yes"],
+)
+
+sync_pool_telemetry = PoolTelemetry("sync")
+engine = create_engine(
+    database_url,
+    poolclass=timed_pool(QueuePool, sync_pool_telemetry),
+    **pool_options,
+)
 Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# use from async code (commands, autocomplete, routes, socket handlers) so queries don't block the event loop
+async_pool_telemetry = PoolTelemetry("async")
+async_engine = create_async_engine(
+    async_database_url,
+    poolclass=timed_pool(AsyncAdaptedQueuePool, async_pool_telemetry),
+    **pool_options,
+)
+AsyncSession = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, bind=async_engine
+)
+
 
 class BackBlazeBills(Base):
     __tablename__ = "storage_expenses"
@@ -118,6 +149,13 @@ class GoldLedger(Base):
     balance: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
 
+def pool_stats() -> dict:
+    return {
+        "sync": pool_status(engine, sync_pool_telemetry),
+        "async": pool_status(async_engine.sync_engine, async_pool_telemetry),
+    }
+
+
 def init_db():
     with Session() as session:
         Base.metadata.create_all(
@@ -0,0 +1,114 @@
+from typing import Dict, List, NamedTuple, Iterable
+
+import msgspec
+from sqlalchemy import select, any_
+
+from database import AsyncSession
+from database.actor_table import ActorTable
+from models.actor_struct import ActorStruct, SpellStruct, WeaponStruct
+from system import TOOLS, ABILITIES, SKILLS, OTHER_ROLLABLES
+from utils import getLogger
+from utils.SearchIndex import SearchIndex
+from utils.TtlLruCache import TtlLruCache
+
+logger = getLogger(__name__)
+
+# (guild_id, discord_id) -> {actor name: ActorIndexEntry}, in name order.
+# Autocomplete hits this on every keystroke. Writes invalidate it, the ttl only catches what they miss.
+actor_index_cache = TtlLruCache("actor_index", maxsize=4096, ttl=30 * 60)
+
+
+class ActorIndexEntry(NamedTuple):
+    """What the character autocompletes need from an actor, precomputed."""
+
+    id: str
+    attacks: SearchIndex
+    details: SearchIndex
+    # abilities, skills, other rollables and the tools the actor has
+    stats: SearchIndex
+    spellcaster: int
+    spell_levels: Dict[str, int]
+    attack_modes: Dict[str, List[str]]
+
+    @staticmethod
+    def from_actor(actor: ActorStruct) -> "ActorIndexEntry":
+        return ActorIndexEntry(
+            id=actor.id,
+            attacks=SearchIndex(sorted(w.name for w in actor.weapons)),
+            details=SearchIndex(
+                sorted(f"{i.type.capitalize()}: {i.name}" for i in actor.details.items)
+            ),
+            stats=SearchIndex(
+                [
+                    *ABILITIES.values(),
+                    *SKILLS.values(),
+                    *OTHER_ROLLABLES.values(),
+                    *[
+                        TOOLS[k]
+                        for k in actor.tools.__struct_fields__
+                        if getattr(actor.tools, k)
+                    ],
+                ]
+            ),
+            spellcaster=actor.attributes.spellcaster,
+            spell_levels={
+                w.name: w.level for w in actor.weapons if isinstance(w, SpellStruct)
+            },
+            attack_modes={
+                w.name: w.attack_modes
+                for w in actor.weapons
+                if isinstance(w, WeaponStruct)
+            },
+        )
+
+
+async def user_actors(guild_id: int, discord_id: int) -> Dict[str, ActorIndexEntry]:
+    key = (guild_id, discord_id)
+    entries = actor_index_cache.get(key)
+    if entries is TtlLruCache.MISS:
+        stmt = (
+            select(ActorTable)
+            .options(ActorTable.projection())
+            .where(
+                ActorTable.guild_id == guild_id,
+                discord_id == any_(ActorTable.discord_ids),
+            )
+            .order_by(ActorTable.name)
+        )
+        async with AsyncSession() as session:
+            rows = (await session.scalars(stmt)).all()
+        entries = {}
+        for row in rows:
+            try:
+                entries[row.name] = ActorIndexEntry.from_actor(ActorStruct.from_row(row))
+            except msgspec.ValidationError as e:
+                logger.warning(f"{row.name} left out of the actor index: {e}")
+        actor_index_cache.set(key, entries)
+    return entries
+
+
+async def user_actor(
+    guild_id: int, discord_id: int, name: str
+) -> ActorIndexEntry | None:
+    return (await user_actors(guild_id, discord_id)).get(name)
+
+
+def invalidate_actors(guild_id: int, actor_ids: Iterable[str], discord_ids: Iterable[int]):
+    """Drop users the actors belong to now, and any user that still has them cached."""
+    actor_ids = set(actor_ids)
+    discord_ids = set(discord_ids)
+    actor_index_cache.invalidate_where(
+        lambda key, entries: key[0] == guild_id
+        and (
+            key[1] in discord_ids
+            or any(e.id in actor_ids for e in entries.values())
+        )
+    )
+
+
+def invalidate_user(guild_id: int, discord_id: int):
+    actor_index_cache.invalidate((guild_id, discord_id))
+
+
+def invalidate_guild(guild_id: int):
+    actor_index_cache.invalidate_where(lambda key, _: key[0] == guild_id)
@@ -1,42 +1,208 @@
-from typing import List
+import time
+from typing import List, Tuple, Dict, Type, Optional
 
-from sqlalchemy import String, BigInteger
-from sqlalchemy.dialects.postgresql import JSONB, ARRAY
+import msgspec
+from pydantic import ValidationError
+from sqlalchemy import String, BigInteger, literal_column, select
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY, insert
 from sqlalchemy.ext.mutable import MutableDict, MutableList
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, load_only, undefer_group
+from sqlalchemy.orm.interfaces import LoaderOption
 
-from database import Base
-from models.actor import Actor
+from database import Base, AsyncSession
+from models.actor import Actor, ActorSummary
+from models.actor_struct import ActorStruct
+from utils import hash_json_object
 
 
 class ActorTable(Base):
+    """
+    The sheet JSONB columns are deferred in the "cold" group and load together on first access.
+    Pick what a query loads with ActorTable.projection.
+    """
+
     __tablename__ = "actors"
     id: Mapped[str] = mapped_column(String, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, index=True, nullable=False)
     guild_id: Mapped[int] = mapped_column(
         BigInteger, primary_key=True, index=True, nullable=False
     )
-    weapons: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
+    weapons: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
     portrait_url: Mapped[str] = mapped_column(String, nullable=True, default=None)
     currency: Mapped[dict] = mapped_column(
-        MutableDict.as_mutable(JSONB), nullable=True, default=None
-    )
-    abilities: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
-    bonuses: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
-    skills: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
-    tools: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
-    attributes: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
-    details: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
-    traits: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
+        MutableDict.as_mutable(JSONB),
+        nullable=True,
+        default=None,
+        deferred=True,
+        deferred_group="cold",
+    )
+    abilities: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
+    bonuses: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
+    skills: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
+    tools: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
+    attributes: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
+    details: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
+    traits: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
     classes: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
-    world: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
+    world: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
+    )
     discord_ids: Mapped[List[int]] = mapped_column(
         MutableList.as_mutable(ARRAY(BigInteger)), nullable=False, default_factory=list
     )
     equipment: Mapped[List[str]] = mapped_column(
-        MutableList.as_mutable(ARRAY(String)), default_factory=list
+        MutableList.as_mutable(ARRAY(String)),
+        default_factory=list,
+        deferred=True,
+        deferred_group="cold",
+    )
+    # level, race, ac, hp and passives copied out of the cold columns, see Actor.to_summary
+    summary: Mapped[dict] = mapped_column(JSONB, nullable=True, default=None)
+    # lets PUT /actor skip unchanged payloads and rewrite only the columns that changed
+    content_hash: Mapped[str] = mapped_column(String, nullable=True, default=None)
+    column_hashes: Mapped[dict] = mapped_column(
+        JSONB, nullable=True, default=None, deferred=True, deferred_group="cold"
     )
 
     @staticmethod
-    def from_model(actor_model: Actor, guild_id: int) -> "ActorTable":
-        return ActorTable(**actor_model.to_dict(), guild_id=guild_id)
+    def from_model(actor_model: Actor | ActorStruct, guild_id: int) -> "ActorTable":
+        actor_dict = {**actor_model.to_dict(), "summary": actor_model.to_summary()}
+        content_hash, column_hashes = ActorTable.hashes(actor_dict)
+        return ActorTable(
+            **actor_dict,
+            guild_id=guild_id,
+            content_hash=content_hash,
+            column_hashes=column_hashes,
+        )
+
+    @staticmethod
+    def projection(model: Type[Actor | ActorSummary] = Actor) -> LoaderOption:
+        """Loader option for the columns model is validated from."""
+        if model is ActorSummary:
+            return load_only(
+                ActorTable.id,
+                ActorTable.guild_id,
+                ActorTable.name,
+                ActorTable.discord_ids,
+                ActorTable.portrait_url,
+                ActorTable.classes,
+                ActorTable.summary,
+            )
+        return undefer_group("cold")
+
+    @staticmethod
+    async def bulk_upsert(
+        session, actor_tables: List["ActorTable"]
+    ) -> Dict[str, bool]:
+        """
+        Multi-row INSERT ... ON CONFLICT. Rows whose content_hash is unchanged aren't touched.
+        Returns actor id -> True if inserted, False if updated. Unchanged actors are absent.
+        """
+        columns = [c.name for c in ActorTable.__table__.columns]
+        written = {}
+        # stay well under postgres' 32767 bind parameter limit
+        chunk_size = 32767 // len(columns) // 2
+        for i in range(0, len(actor_tables), chunk_size):
+            stmt = insert(ActorTable).values(
+                [
+                    {c: getattr(a, c) for c in columns}
+                    for a in actor_tables[i : i + chunk_size]
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ActorTable.id, ActorTable.guild_id],
+                set_={
+                    c: stmt.excluded[c] for c in columns if c not in ["id", "guild_id"]
+                },
+                where=ActorTable.content_hash.is_distinct_from(
+                    stmt.excluded.content_hash
+                ),
+            ).returning(ActorTable.id, literal_column("xmax = 0").label("inserted"))
+            written.update(
+                {row.id: row.inserted for row in await session.execute(stmt)}
+            )
+        return written
+
+    @staticmethod
+    def hashes(actor_dict: dict) -> Tuple[str, dict]:
+        column_hashes = {k: hash_json_object(v) for k, v in actor_dict.items()}
+        return hash_json_object(column_hashes), column_hashes
+
+
+async def check_actor_codecs(guild_id: Optional[int] = None, limit: int = 100) -> dict:
+    """
+    Decode stored actors with both Actor and ActorStruct and compare their to_dict().
+    Times request decoding (JSON bytes) and row hydration (ActorTable) per actor for each.
+    """
+    stmt = select(ActorTable).options(ActorTable.projection()).limit(limit)
+    if guild_id:
+        stmt = stmt.filter_by(guild_id=guild_id)
+
+    async with AsyncSession() as session:
+        rows = (await session.scalars(stmt)).all()
+    payloads = [
+        msgspec.json.encode({f: getattr(row, f) for f in Actor.model_fields})
+        for row in rows
+    ]
+
+    mismatches = []
+    for row, payload in zip(rows, payloads):
+        try:
+            expected = Actor.model_validate_json(payload).to_dict()
+        except ValidationError:
+            # no longer valid under the current model, not a codec difference
+            continue
+        try:
+            actual = ActorStruct.decode(payload).to_dict()
+        except msgspec.DecodeError as e:
+            mismatches.append({"id": row.id, "error": str(e)})
+            continue
+        if actual != expected:
+            mismatches.append(
+                {
+                    "id": row.id,
+                    "keys": sorted(
+                        k
+                        for k in {*expected, *actual}
+                        if expected.get(k) != actual.get(k)
+                    ),
+                }
+            )
+
+    def per_actor_us(fn, items) -> float:
+        start = time.perf_counter()
+        for item in items:
+            try:
+                fn(item)
+            except (ValidationError, msgspec.DecodeError):
+                pass
+        return round((time.perf_counter() - start) * 1e6 / len(items), 1) if items else 0
+
+    return {
+        "actors": len(rows),
+        "mismatches": mismatches,
+        "decode_us_per_actor": {
+            "pydantic": per_actor_us(Actor.model_validate_json, payloads),
+            "msgspec": per_actor_us(ActorStruct.decode, payloads),
+        },
+        "hydrate_us_per_actor": {
+            "pydantic": per_actor_us(Actor.model_validate, rows),
+            "msgspec": per_actor_us(ActorStruct.from_row, rows),
+        },
+    }
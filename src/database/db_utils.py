@@ -2,10 +2,13 @@ from discord import Guild, RawMemberRemoveEvent, User
 from sqlalchemy import cast, BigInteger, func
 
 from database import Session, CampaignTable, DowntimeTable
+from database import actor_index
 from database.actor_table import ActorTable
 from database.game_master_table import GameMasterTable
 from database.guild_settings_table import GuildSettingsTable
 from database.missions import MissionTable
+from database.xp_ledger import XpLedgerTable
+from models.actor import ActorSummary
 
 
 def delete_guild(guild: Guild):
@@ -16,9 +19,12 @@ def delete_guild(guild: Guild):
         session.query(DowntimeTable).filter_by(guild_id=guild_id).delete()
         session.query(GameMasterTable).filter_by(guild_id=guild_id).delete()
         session.query(MissionTable).filter_by(guild_id=guild_id).delete()
+        session.query(XpLedgerTable).filter_by(guild_id=guild_id).delete()
         # session.query(GoldLedger).filter_by(guild_id=guild_id).delete()
         session.query(GuildSettingsTable).filter_by(id=guild_id).delete()
         session.commit()
+    GuildSettingsTable.invalidate(guild_id)
+    actor_index.invalidate_guild(guild_id)
 
 
 def delete_member(event: RawMemberRemoveEvent):
@@ -33,6 +39,7 @@ def delete_member(event: RawMemberRemoveEvent):
         # Find records to delete where discord_ids contains only member_id
         records_to_delete = (
             session.query(ActorTable)
+            .options(ActorTable.projection(ActorSummary))
             .filter_by(guild_id=guild_id)
             .filter(func.array_length(ActorTable.discord_ids, 1) == 1)
             .filter(ActorTable.discord_ids[1] == cast(member_id, BigInteger))
@@ -47,3 +54,4 @@ def delete_member(event: RawMemberRemoveEvent):
         ).delete()
 
         session.commit()
+    actor_index.invalidate_user(guild_id, member_id)
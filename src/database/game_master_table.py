@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, String
+from sqlalchemy import BigInteger, String, select
 from sqlalchemy.orm import mapped_column, Mapped
 
 from database import Base, Session
@@ -21,9 +21,9 @@ class GameMasterTable(Base):
                 id=discord_id, guild_id=guild_id
             ).one_or_none() or GameMasterTable(id=discord_id, guild_id=guild_id)
 
-        if not all(i for i in [gm_settings.timezone]):
-            guild_settings = GuildSettingsTable.lookup(guild_id)
             if gm_settings.timezone is None:
-                gm_settings.timezone = guild_settings.timezone
+                gm_settings.timezone = session.scalar(
+                    select(GuildSettingsTable.timezone).filter_by(id=guild_id)
+                )
 
         return gm_settings
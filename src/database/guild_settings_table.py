@@ -2,21 +2,27 @@ from datetime import time
 from typing import Optional
 
 from discord import Bot, Guild
-from sqlalchemy import BigInteger, Enum, String, Time, Integer, Boolean
+from sqlalchemy import BigInteger, Enum, String, Time, Integer, Boolean, select
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import mapped_column, Mapped
 
-from database import Session, Base
+from database import Session, AsyncSession, Base
 from models.guild_settings import Subscription, GuildSettings, Day, current_subscription
 from utils import getLogger
+from utils.TtlLruCache import TtlLruCache
 
 logger = getLogger(__name__)
 
+# settings change a few times a month but are read on nearly every command.
+# cached models are never handed out directly, callers get a copy they are free to mutate.
+guild_settings_cache = TtlLruCache("guild_settings", maxsize=2048, ttl=15 * 60)
+# foundry sends its token with every request and socket connect. token -> guild id
+auth_token_cache = TtlLruCache("auth_token", maxsize=2048, ttl=15 * 60)
+# kept apart so a client retrying a bad token can't push valid tokens out
+bad_auth_token_cache = TtlLruCache("bad_auth_token", maxsize=1024, ttl=30)
 
-# Some example adds
-# ALTER TABLE guild_settings ADD COLUMN roll_discord_to_foundry BOOLEAN DEFAULT FALSE
-# ALTER TABLE guild_settings ADD COLUMN pending_xp JSONB
-# ALTER TABLE guild_settings ADD COLUMN last_indexed_message_id bigint
+
+# New columns need a migration in database/migrations.py, create_all won't add them.
 class GuildSettingsTable(Base):
     __tablename__ = "guild_settings"
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
@@ -68,22 +74,64 @@ class GuildSettingsTable(Base):
             guild_settings_table = GuildSettingsTable.from_model(guild_settings)
             session.merge(guild_settings_table)
             session.commit()
+        guild_settings_cache.set(
+            guild_settings.id, guild_settings.model_copy(deep=True)
+        )
 
     @staticmethod
-    def lookup(guild_id: int) -> Optional[GuildSettings]:
-        with Session() as session:
-            res = session.query(GuildSettingsTable).filter_by(id=guild_id).one_or_none()
-            return GuildSettings.model_validate(res) if res else None
+    def invalidate(guild_id: int, auth_token: str | None = None):
+        """Call after writing to guild_settings without going through commit."""
+        guild_settings_cache.invalidate(guild_id)
+        if auth_token:
+            auth_token_cache.invalidate(auth_token)
+
+    @staticmethod
+    async def lookup_by_auth_token(auth_token: str) -> Optional[GuildSettings]:
+        if bad_auth_token_cache.get(auth_token) is not TtlLruCache.MISS:
+            return None
+
+        guild_id = auth_token_cache.get(auth_token)
+        if guild_id is TtlLruCache.MISS:
+            async with AsyncSession() as session:
+                guild_id = await session.scalar(
+                    select(GuildSettingsTable.id).filter_by(auth_token=auth_token)
+                )
+            if guild_id is None:
+                bad_auth_token_cache.set(auth_token, None)
+                return None
+            auth_token_cache.set(auth_token, guild_id)
+
+        guild_settings = await GuildSettingsTable.lookup(guild_id)
+        if not guild_settings or guild_settings.auth_token != auth_token:
+            # token was rotated or the guild removed since it was cached
+            auth_token_cache.invalidate(auth_token)
+            return None
+        return guild_settings
+
+    @staticmethod
+    async def lookup(guild_id: int) -> Optional[GuildSettings]:
+        guild_settings = guild_settings_cache.get(guild_id)
+        if guild_settings is TtlLruCache.MISS:
+            async with AsyncSession() as session:
+                res = await session.scalar(
+                    select(GuildSettingsTable).filter_by(id=guild_id)
+                )
+                if not res:
+                    return None
+                guild_settings = GuildSettings.model_validate(res)
+            guild_settings_cache.set(guild_id, guild_settings)
+        return guild_settings.model_copy(deep=True)
 
     @staticmethod
-    def update_subscription(bot: Bot, guild: Guild):
-        guild_settings = GuildSettingsTable.lookup(guild.id)
+    async def update_subscription(bot: Bot, guild: Guild):
+        guild_settings = await GuildSettingsTable.lookup(guild.id)
         subscription = current_subscription(bot, guild)
         if subscription != guild_settings.subscription:
             logger.warning(
                 f"{guild.name}: {guild_settings.subscription.name} -> {subscription.name}"
             )
             guild_settings.subscription = subscription
-            with Session() as session:
-                session.merge(GuildSettingsTable.from_model(guild_settings))
-                session.commit()
+            async with AsyncSession() as session:
+                await session.merge(GuildSettingsTable.from_model(guild_settings))
+                await session.commit()
+            guild_settings_cache.set(guild.id, guild_settings.model_copy(deep=True))
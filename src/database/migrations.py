@@ -0,0 +1,180 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, NamedTuple
+
+from sqlalchemy import Integer, String, DateTime, func, select, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base, engine, Session
+from utils import getLogger
+
+logger = getLogger(__name__)
+
+# arbitrary, shared by every instance so only one of them migrates at a time
+_advisory_lock_key = 718_094_332
+
+
+class SchemaMigrationTable(Base):
+    __tablename__ = "schema_migrations"
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), init=False
+    )
+
+
+class ConcurrentIndex(NamedTuple):
+    """CREATE INDEX CONCURRENTLY {name} ON {definition}"""
+
+    name: str
+    definition: str
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    statements: List[str | ConcurrentIndex] = field(default_factory=list)
+
+    def concurrent(self) -> bool:
+        """CONCURRENTLY can't run inside a transaction block."""
+        return any(isinstance(s, ConcurrentIndex) for s in self.statements)
+
+
+# Append only. Never edit or reorder a migration once it has shipped.
+# New tables come from Base.metadata.create_all in init_db, changes to existing ones go here.
+migrations: List[Migration] = [
+    Migration(
+        1,
+        "guild_settings columns added by hand before migrations existed",
+        [
+            "ALTER TABLE guild_settings ADD COLUMN IF NOT EXISTS roll_discord_to_foundry BOOLEAN DEFAULT FALSE",
+            "ALTER TABLE guild_settings ADD COLUMN IF NOT EXISTS pending_xp JSONB",
+            "ALTER TABLE guild_settings ADD COLUMN IF NOT EXISTS last_indexed_message_id BIGINT",
+        ],
+    ),
+    Migration(
+        2,
+        "array membership and mission lookup indexes",
+        [
+            ConcurrentIndex(
+                "ix_actors_discord_ids_gin", "actors USING gin (discord_ids)"
+            ),
+            ConcurrentIndex(
+                "ix_missions_pcs_gin", "missions USING gin (pcs)"
+            ),
+            ConcurrentIndex(
+                "ix_missions_pcs_standby_gin", "missions USING gin (pcs_standby)"
+            ),
+            ConcurrentIndex(
+                "ix_campaign_actor_ids_gin", "campaign USING gin (actor_ids)"
+            ),
+            ConcurrentIndex(
+                "ix_missions_guild_id_event_id", "missions (guild_id, event_id)"
+            ),
+            ConcurrentIndex(
+                "ix_missions_guild_id_title", "missions (guild_id, title)"
+            ),
+            ConcurrentIndex(
+                "ix_missions_guild_id_date_time", "missions (guild_id, date_time)"
+            ),
+        ],
+    ),
+    Migration(
+        3,
+        "trigram indexes for autocomplete name search",
+        [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            ConcurrentIndex(
+                "ix_actors_name_trgm", "actors USING gin (name gin_trgm_ops)"
+            ),
+            ConcurrentIndex(
+                "ix_missions_title_trgm", "missions USING gin (title gin_trgm_ops)"
+            ),
+        ],
+    ),
+    Migration(
+        4,
+        "actor content hashes",
+        [
+            "ALTER TABLE actors ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+            "ALTER TABLE actors ADD COLUMN IF NOT EXISTS column_hashes JSONB",
+        ],
+    ),
+    Migration(
+        5,
+        "actor summary column",
+        [
+            "ALTER TABLE actors ADD COLUMN IF NOT EXISTS summary JSONB",
+            # same shape as Actor.to_summary
+            "UPDATE actors SET summary = jsonb_build_object("
+            "'level', details->'level', "
+            "'race', details->'race', "
+            "'ac', attributes->'ac'->'value', "
+            "'hp', attributes->'hp'->'max', "
+            "'passives', jsonb_build_object("
+            "'prc', skills->'prc'->'passive', "
+            "'ins', skills->'ins'->'passive', "
+            "'inv', skills->'inv'->'passive')"
+            ") WHERE summary IS NULL",
+        ],
+    ),
+]
+
+
+def _create_index_concurrently(connection, index: ConcurrentIndex):
+    valid = connection.scalar(
+        text(
+            "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name"
+        ),
+        {"name": index.name},
+    )
+    if valid is False:
+        # an interrupted concurrent build leaves an invalid index behind that IF NOT EXISTS would skip
+        logger.warning(f"Dropping invalid index {index.name}")
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+    connection.execute(
+        text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.definition}"
+        )
+    )
+
+
+def _apply(migration: Migration):
+    logger.critical(f"Applying migration {migration.version}: {migration.name}")
+    if migration.concurrent():
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            for statement in migration.statements:
+                if isinstance(statement, ConcurrentIndex):
+                    _create_index_concurrently(connection, statement)
+                else:
+                    connection.execute(text(statement))
+    else:
+        with engine.begin() as connection:
+            for statement in migration.statements:
+                connection.execute(text(statement))
+
+    with Session() as session:
+        session.add(
+            SchemaMigrationTable(version=migration.version, name=migration.name)
+        )
+        session.commit()
+
+
+def run_migrations():
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _advisory_lock_key})
+        try:
+            with Session() as session:
+                applied = set(session.scalars(select(SchemaMigrationTable.version)))
+
+            for migration in sorted(migrations, key=lambda m: m.version):
+                if migration.version not in applied:
+                    _apply(migration)
+        finally:
+            lock.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": _advisory_lock_key}
+            )
@@ -7,7 +7,8 @@ from sqlalchemy import BigInteger, String, Integer, DateTime, Boolean, ARRAY
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Mapped, mapped_column
 
-from database import Base, Session
+from database import Base, AsyncSession
+from database.xp_ledger import refresh_xp_ledger
 from models.missions import Mission
 from utils import getLogger
 
@@ -108,7 +109,7 @@ async def edit_mission(
             cover=image_bytes if image_bytes else MISSING,
         )
 
-    upset_errors = upsert_mission(guild, mission, add_event_fun)
+    upset_errors = await upsert_mission(guild, mission, add_event_fun)
     errors.extend(upset_errors)
 
     channel_or_thread = guild.get_channel_or_thread(mission.channel_or_thread_id)
@@ -130,7 +131,7 @@ async def edit_mission(
     return errors
 
 
-def upsert_mission(
+async def upsert_mission(
     guild: Guild, mission: Mission, add_event_fun: Callable
 ) -> list[str]:
     """
@@ -140,12 +141,18 @@ def upsert_mission(
     errors = []
     mission_table = MissionTable.from_model(mission)
     try:
-        with Session() as session:
+        async with AsyncSession() as session:
+            xp_actor_ids = {*mission.pcs, mission.gm_pc}
             if mission_table.id:
-                session.merge(mission_table)
+                previous = await session.get(MissionTable, mission_table.id)
+                if previous:
+                    xp_actor_ids.update([*previous.pcs, previous.gm_pc])
+                await session.merge(mission_table)
             else:
                 session.add(mission_table)
-            session.commit()
+            await session.flush()
+            await refresh_xp_ledger(session, mission.guild_id, xp_actor_ids)
+            await session.commit()
             add_event_fun(
                 mission_id=mission_table.id,
                 event=guild.get_scheduled_event(mission.event_id),
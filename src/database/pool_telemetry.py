@@ -0,0 +1,107 @@
+import threading
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Type
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# upper bounds in milliseconds, anything slower lands in the final "+Inf" bucket
+latency_buckets_ms = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolTelemetry:
+    """Counters for connection checkouts from a single pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._latency_counts = [0] * (len(latency_buckets_ms) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.latency_total = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.latency_total += seconds
+            self._latency_counts[bisect_left(latency_buckets_ms, seconds * 1000)] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            # cumulative like Prometheus buckets, le_inf always equals checkouts
+            cumulative = list(accumulate(self._latency_counts))
+            histogram = {
+                **{f"le_{b}ms": c for b, c in zip(latency_buckets_ms, cumulative)},
+                "le_inf": cumulative[-1],
+            }
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total_ms": round(self.wait_total * 1000, 3),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_avg_ms": round(self.wait_total * 1000 / self.checkouts, 3)
+                if self.checkouts
+                else 0,
+                "checkout_latency_avg_ms": round(
+                    self.latency_total * 1000 / self.checkouts, 3
+                )
+                if self.checkouts
+                else 0,
+                "checkout_latency_histogram": histogram,
+            }
+
+
+def timed_pool(
+    pool_class: Type[QueuePool], telemetry: PoolTelemetry
+) -> Type[QueuePool]:
+    """
+    Subclass pool_class so every checkout is timed.
+    Wait time covers waiting on the queue, checkout latency also includes connecting and pre-ping.
+    Pool.recreate() builds from self.__class__, so telemetry survives engine.dispose().
+    """
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                telemetry.record_timeout()
+                raise
+            finally:
+                telemetry.record_wait(time.perf_counter() - start)
+
+        def connect(self):
+            start = time.perf_counter()
+            connection = super().connect()
+            telemetry.record_checkout(time.perf_counter() - start)
+            return connection
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def pool_status(engine, telemetry: PoolTelemetry) -> dict:
+    pool = engine.pool
+    return {
+        "pool_size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+        **telemetry.to_dict(),
+    }
@@ -0,0 +1,191 @@
+import textwrap
+from typing import Iterable, Optional
+
+from sqlalchemy import BigInteger, String, Integer, text, TextClause, delete, select
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base, AsyncSession
+from utils import getLogger
+
+logger = getLogger(__name__)
+
+
+class XpLedgerTable(Base):
+    """
+    Running XP totals per actor, so XP lookups don't scan every mission in the guild.
+    starting_level is the actor's earliest campaign, None falls back to the guild's starting level.
+    """
+
+    __tablename__ = "xp_ledger"
+    guild_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    actor_id: Mapped[str] = mapped_column(String, primary_key=True)
+    mission_xp: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    adjustment_xp: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    starting_level: Mapped[int] = mapped_column(Integer, nullable=True, default=None)
+
+
+_refresh_xp_ledger = text(
+    textwrap.dedent("""
+    insert into xp_ledger (guild_id, actor_id, mission_xp, adjustment_xp, starting_level)
+    select g.guild_id, a.actor_id,
+        coalesce((
+            select sum(q.xp) from (
+                select m.xp from missions m, unnest(m.pcs::text[]) as pc
+                where m.guild_id = g.guild_id and pc = a.actor_id
+                union all
+                select m.gm_xp as xp from missions m
+                where m.guild_id = g.guild_id and m.gm_pc = a.actor_id
+            ) as q
+        ), 0),
+        coalesce((
+            select sum(x.xp) from xp_adjustments x
+            where x.guild_id = g.guild_id and x.actor_id = a.actor_id
+        ), 0),
+        (
+            select c.starting_level from campaign c
+            where c.guild_id = g.guild_id and a.actor_id = any(c.actor_ids::text[])
+            order by c.id
+            limit 1
+        )
+    from (select cast(:guild_id as bigint) as guild_id) as g,
+        unnest(cast(:actor_ids as text[])) as a(actor_id)
+    on conflict (guild_id, actor_id) do update set
+        mission_xp = excluded.mission_xp,
+        adjustment_xp = excluded.adjustment_xp,
+        starting_level = excluded.starting_level
+""")
+)
+
+
+# one transaction at a time per ledger row, taken in the order of the (sorted) array so two refreshes can't deadlock
+_lock_xp_ledger = text(
+    textwrap.dedent("""
+    select pg_advisory_xact_lock(hashtextextended(cast(:guild_id as bigint) || ':' || a.actor_id, 0))
+    from unnest(cast(:actor_ids as text[])) as a(actor_id)
+""")
+)
+
+
+async def refresh_xp_ledger(
+    session, guild_id: int, actor_ids: Iterable[Optional[str]]
+) -> None:
+    """
+    Recompute the ledger rows of actor_ids.
+    Call it in the same transaction as the write that changed their XP, after a flush. Refreshes of the same actor
+    queue up behind each other's commit, and the totals are read by a later statement than the one that waited,
+    so they include whatever the transaction before committed.
+    """
+    actor_ids = sorted({a for a in actor_ids if a})
+    if not actor_ids:
+        return
+    params = {"guild_id": guild_id, "actor_ids": actor_ids}
+    await session.execute(_lock_xp_ledger, params)
+    await session.execute(_refresh_xp_ledger, params)
+
+
+def _mission_xp_query(pc_id: str, guild_id: int) -> TextClause:
+    return text(
+        textwrap.dedent("""
+        select sum(q.xp) as xp from (
+            select unnest(pcs::text[]) as pc, xp
+            from missions where guild_id=:guild_id
+            union all
+            select gm_pc as pc, gm_xp as xp
+            from missions where guild_id=:guild_id
+        ) as q
+        where pc=:pc_id
+        group by pc
+    """)
+    ).bindparams(guild_id=guild_id, pc_id=pc_id)
+
+
+async def _recompute(session, guild_id: int, actor_id: str) -> tuple:
+    """XP components the way they were computed before the ledger existed."""
+    mission_xp = await session.scalar(_mission_xp_query(actor_id, guild_id)) or 0
+    adjustment_xp = (
+        await session.scalar(
+            text(
+                "select sum(xp) from xp_adjustments "
+                "where guild_id=:guild_id and actor_id=:actor_id"
+            ).bindparams(guild_id=guild_id, actor_id=actor_id)
+        )
+        or 0
+    )
+    starting_level = await session.scalar(
+        text(
+            "select starting_level from campaign "
+            "where guild_id=:guild_id and :actor_id = any(actor_ids::text[]) "
+            "order by id limit 1"
+        ).bindparams(guild_id=guild_id, actor_id=actor_id)
+    )
+    return mission_xp, adjustment_xp, starting_level
+
+
+async def rebuild_xp_ledger(guild_id: Optional[int] = None) -> dict:
+    """Recompute the ledger from scratch, then verify every row against the original per-actor queries."""
+    actors_stmt = text("select guild_id, id from actors")
+    if guild_id:
+        actors_stmt = text(
+            "select guild_id, id from actors where guild_id=:guild_id"
+        ).bindparams(guild_id=guild_id)
+
+    async with AsyncSession() as session:
+        guilds_to_actor_ids = {}
+        for g_id, actor_id in await session.execute(actors_stmt):
+            guilds_to_actor_ids.setdefault(g_id, []).append(actor_id)
+
+        before = {
+            (r.guild_id, r.actor_id): (r.mission_xp, r.adjustment_xp, r.starting_level)
+            for r in await session.scalars(
+                select(XpLedgerTable).where(
+                    XpLedgerTable.guild_id.in_(guilds_to_actor_ids)
+                )
+            )
+        }
+        session.expunge_all()
+
+        # lock before the delete takes the row locks, in the same order a refresh would
+        for g_id, actor_ids in guilds_to_actor_ids.items():
+            await session.execute(
+                _lock_xp_ledger, {"guild_id": g_id, "actor_ids": sorted(set(actor_ids))}
+            )
+        await session.execute(
+            delete(XpLedgerTable).where(XpLedgerTable.guild_id.in_(guilds_to_actor_ids))
+        )
+        for g_id, actor_ids in guilds_to_actor_ids.items():
+            await refresh_xp_ledger(session, g_id, actor_ids)
+        await session.commit()
+
+        after = {
+            (r.guild_id, r.actor_id): (r.mission_xp, r.adjustment_xp, r.starting_level)
+            for r in await session.scalars(
+                select(XpLedgerTable).where(
+                    XpLedgerTable.guild_id.in_(guilds_to_actor_ids)
+                )
+            )
+        }
+
+        mismatches = []
+        for (g_id, actor_id), ledger in after.items():
+            expected = await _recompute(session, g_id, actor_id)
+            if ledger != expected:
+                mismatches.append(
+                    {
+                        "guild_id": str(g_id),
+                        "actor_id": actor_id,
+                        "ledger": ledger,
+                        "expected": expected,
+                    }
+                )
+
+    if mismatches:
+        logger.error(f"xp ledger rebuild mismatches: {mismatches}")
+
+    return {
+        "guilds": len(guilds_to_actor_ids),
+        "actors": len(after),
+        "corrected": sum(
+            1 for k, v in after.items() if k in before and before[k] != v
+        ),
+        "mismatches": mismatches,
+    }
@@ -26,13 +26,20 @@ from groups.autocomplete import (
     attack_mode_autocomplete,
 )
 from groups.top_level import r, roll_attack, roll, action
+from integrations import magic_shop
 from models.socket_aware_bot import SocketAwareBot
 from routers.socket_io import sio
 from routers.socket_namespace import SocketNamespace
+from system.catalog import warm_up
+from system.embed_cache import lookup_embeds
 from utils import oronder_bot_prod, getLogger, run_uptime_monitor
+from utils.ImageFetcher import image_fetcher
 
 logger = getLogger(__name__)
 token = os.environ["DISCORD_TOKEN"]
+# load the 5etools catalogs in the background once connected, instead of on the first command that needs them
+warm_up_system = os.getenv("SYSTEM_WARM_UP", "true").lower() == "true"
+_warm_up_task: asyncio.Task | None = None
 
 intents = Intents.default()
 # noinspection PyDunderSlots,PyUnresolvedReferences
@@ -58,15 +65,50 @@ async def start():
 
 
 async def stop():
-    await bot.close()
-    bot.socket_namespace.stop()
+    try:
+        await bot.close()
+        bot.socket_namespace.stop()
+    finally:
+        await magic_shop.close()
+        await image_fetcher.close()
+        _save_caches()
+
+
+def _save_caches():
+    # saved even when closing the bot failed, each on its own so one bad write doesn't lose the rest
+    for name, save in [
+        ("lookup embeds", lookup_embeds.save),
+        ("5emagic.shop prices", magic_shop.save),
+    ]:
+        try:
+            save()
+        except Exception:
+            logger.exception(f"Could not save {name}")
+
+
+async def _warm_up():
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception:
+        logger.exception("System catalog warm up failed")
+        return
+    if lookup_embeds.prebuild_count:
+        try:
+            await lookup_embeds.prebuild()
+        except Exception:
+            logger.exception("Prebuilding lookup embeds failed")
 
 
 @bot.event
 async def on_ready():
+    global _warm_up_task
     logger.critical("Bot Ready")
     sio.register_namespace(SocketNamespace(bot, "/"))
 
+    # on_ready fires again after every reconnect
+    if warm_up_system and _warm_up_task is None:
+        _warm_up_task = asyncio.create_task(_warm_up())
+
     if bot.application_id == oronder_bot_prod:
         await run_uptime_monitor()
 
@@ -1,14 +1,14 @@
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Type
 
 from discord import ApplicationContext
 from sqlalchemy import select, any_
 from sqlalchemy.exc import NoResultFound, MultipleResultsFound
 
-from database import Session
+from database import Session, AsyncSession
 from database.actor_table import ActorTable
 from database.guild_settings_table import GuildSettingsTable
 from database.missions import MissionTable
-from models.actor import Actor
+from models.actor import Actor, ActorSummary
 from models.missions import Mission
 from utils import oronder_server_id, chris_discord_id, getLogger
 
@@ -37,17 +37,21 @@ def invite_link(ctx: ApplicationContext):
         return "https://discord.gg/Adg48Xrs6K"
 
 
-def get_actors(discord_id: int, guild_id: int) -> Tuple[List[Actor], Optional[dict]]:
+async def get_actors(
+    discord_id: int, guild_id: int, model: Type[Actor | ActorSummary] = Actor
+) -> Tuple[List[Actor | ActorSummary], Optional[dict]]:
     stmt = (
         select(ActorTable)
+        .options(ActorTable.projection(model))
         .where(discord_id == any_(ActorTable.discord_ids))
         .where(ActorTable.guild_id == guild_id)
     )
 
     try:
-        with Session() as session:
+        async with AsyncSession() as session:
             return [
-                Actor.model_validate(actor) for actor in session.scalars(stmt).all()
+                model.model_validate(actor)
+                for actor in (await session.scalars(stmt)).all()
             ], None
 
     except NoResultFound:
@@ -58,11 +62,16 @@ def get_actors(discord_id: int, guild_id: int) -> Tuple[List[Actor], Optional[di
         return None, logger.err_msg(str(e), guild_id)
 
 
-def get_actor(
-    character: str, discord_id: int, guild_id: int, gm: bool = False
-) -> Tuple[Actor, dict]:
+async def get_actor(
+    character: str,
+    discord_id: int,
+    guild_id: int,
+    gm: bool = False,
+    model: Type[Actor | ActorSummary] = Actor,
+) -> Tuple[Actor | ActorSummary, dict]:
     stmt = (
         select(ActorTable)
+        .options(ActorTable.projection(model))
         .where(ActorTable.name == character)
         .where(ActorTable.guild_id == guild_id)
     )
@@ -71,8 +80,8 @@ def get_actor(
         stmt = stmt.where(discord_id == any_(ActorTable.discord_ids))
 
     try:
-        with Session() as session:
-            return Actor.model_validate(session.scalars(stmt).one()), None
+        async with AsyncSession() as session:
+            return model.model_validate((await session.scalars(stmt)).one()), None
 
     except NoResultFound:
         return None, logger.err_msg(f"Character {character} not found!", guild_id)
@@ -100,7 +109,7 @@ def get_mission_for_edit(title: str, ctx: ApplicationContext) -> Tuple[Mission,
 
 
 async def is_gm(ctx: ApplicationContext):
-    guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+    guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
     if not guild_settings:
         await ctx.respond(no_init_err_msg, ephemeral=True)
         return False
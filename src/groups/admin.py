@@ -69,7 +69,7 @@ class Admin(Cog):
         async def init_rollcalls():
             await self.bot.wait_until_ready()
             for guild in self.bot.guilds:
-                guild_settings = GuildSettingsTable.lookup(guild.id)
+                guild_settings = await GuildSettingsTable.lookup(guild.id)
                 if guild_settings and guild_settings.rollcall_enabled:
                     self.rollcalls[guild.id] = self.bot.loop.create_task(
                         self.sleep_for_rollcall(self.bot, guild, guild_settings)
@@ -239,7 +239,7 @@ class Admin(Cog):
         downtime_gm_channel: TextChannel | None = None,
         gm_xp: int = 0,
     ):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if guild_settings:
             await ctx.respond(
                 **logger.err_msg(
@@ -338,7 +338,7 @@ class Admin(Cog):
 
     @admin_group.command(name="info", description="Show Oronder Settings.")
     async def info(self, ctx: ApplicationContext):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
@@ -450,7 +450,7 @@ class Admin(Cog):
         starting_level: int | None = None,
         gm_xp: int | None = None,
     ):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
@@ -590,7 +590,7 @@ class Admin(Cog):
         "confirmation", str, description="Type your discord server's name to confirm."
     )
     async def auth(self, ctx: ApplicationContext, confirmation: str):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         errors = []
         if not guild_settings:
             errors.append(no_init_err_msg)
@@ -615,6 +615,7 @@ class Admin(Cog):
             )
             record_to_update.auth_token = token
             session.commit()
+        GuildSettingsTable.invalidate(ctx.guild_id, guild_settings.auth_token)
 
         await ctx.respond(
             f"Your Foundry VTT token can be set with:\n`await game.settings.set('oronder', 'auth', '{token}')`\nDo not share this with anyone.",
@@ -642,7 +643,7 @@ class Admin(Cog):
         day: str | None = None,
         time: str | None = None,
     ):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
@@ -690,6 +691,7 @@ class Admin(Cog):
 
                 guild_settings = GuildSettings.model_validate(guild_settings_table)
                 session.commit()
+            GuildSettingsTable.invalidate(ctx.guild_id)
         except NoResultFound:
             await ctx.respond(no_init_err_msg, ephemeral=True)
             return
@@ -735,7 +737,7 @@ class Admin(Cog):
                     )  # sleep for 24 hours
                 else:
                     await asyncio.sleep(sleep_seconds)
-                    guild_settings = GuildSettingsTable.lookup(
+                    guild_settings = await GuildSettingsTable.lookup(
                         guild.id
                     )  # refresh settings before running
                     rollcall_channel = guild.get_channel(
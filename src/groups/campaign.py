@@ -14,15 +14,16 @@ from discord.ext.commands import Bot
 from discord.utils import generate_snowflake
 from sqlalchemy import select
 
-from database import Session, CampaignTable
+from database import Session, AsyncSession, CampaignTable
 from database.actor_table import ActorTable
+from database.xp_ledger import refresh_xp_ledger
 from groups import is_gm, DISABLE
 from groups.autocomplete import (
     campaign_autocomplete,
     campaign_add_autocomplete,
     campaign_remove_pc_autocomplete,
 )
-from models.actor import Actor
+from models.actor import ActorSummary
 from utils import capitalize_title, getLogger
 
 logger = getLogger(__name__)
@@ -133,11 +134,9 @@ class Campaign(Cog):
             await ctx.respond("No changes selected.", ephemeral=True)
             return
 
-        with Session() as session:
-            if (
-                session.query(CampaignTable)
-                .filter_by(name=new_name, guild_id=ctx.guild_id)
-                .one_or_none()
+        async with AsyncSession() as session:
+            if await session.scalar(
+                select(CampaignTable).filter_by(name=new_name, guild_id=ctx.guild_id)
             ):
                 await ctx.respond(
                     **logger.err_msg(
@@ -146,10 +145,12 @@ class Campaign(Cog):
                 )
             else:
                 cur = (
-                    session.query(CampaignTable)
-                    .filter_by(name=current_name, guild_id=ctx.guild_id)
-                    .one()
-                )
+                    await session.scalars(
+                        select(CampaignTable).filter_by(
+                            name=current_name, guild_id=ctx.guild_id
+                        )
+                    )
+                ).one()
                 embed = Embed(title="Campaign Update")
                 if new_name:
                     embed.add_field(
@@ -179,7 +180,10 @@ class Campaign(Cog):
                     )
                     cur.voice_channel_id = voice_channel.id
 
-                session.commit()
+                await session.flush()
+                if starting_level:
+                    await refresh_xp_ledger(session, ctx.guild_id, cur.actor_ids)
+                await session.commit()
 
                 await ctx.respond(embed=embed, ephemeral=True)
 
@@ -209,8 +213,9 @@ class Campaign(Cog):
             embed.add_field(name="Voice Channel", value=voice_channel.mention)
 
             actors = [
-                Actor.model_validate(a)
+                ActorSummary.model_validate(a)
                 for a in session.query(ActorTable)
+                .options(ActorTable.projection(ActorSummary))
                 .filter_by(guild_id=ctx.guild_id)
                 .filter(ActorTable.id.in_(campaign.actor_ids))
             ]
@@ -242,19 +247,19 @@ class Campaign(Cog):
             )
             return
 
-        with Session() as session:
-            campaign = (
-                session.query(CampaignTable)
-                .filter_by(name=name, guild_id=ctx.guild_id)
-                .one_or_none()
+        async with AsyncSession() as session:
+            campaign = await session.scalar(
+                select(CampaignTable).filter_by(name=name, guild_id=ctx.guild_id)
             )
             if not campaign:
                 await ctx.respond(
                     **logger.err_msg(f"Campaign **{name}** not found.", ctx.guild_id)
                 )
                 return
-            session.delete(campaign)
-            session.commit()
+            await session.delete(campaign)
+            await session.flush()
+            await refresh_xp_ledger(session, ctx.guild_id, campaign.actor_ids)
+            await session.commit()
 
         await ctx.respond(f"Campaign **{name}** deleted.", ephemeral=True)
 
@@ -283,8 +288,8 @@ class Campaign(Cog):
     async def campaign_add_pc(
         self, ctx: ApplicationContext, campaign_name: str, actor_name: str
     ):
-        with Session() as session:
-            pc_id = session.scalar(
+        async with AsyncSession() as session:
+            pc_id = await session.scalar(
                 select(ActorTable.id).filter_by(guild_id=ctx.guild_id, name=actor_name)
             )
             if not pc_id:
@@ -293,7 +298,7 @@ class Campaign(Cog):
                 )
                 return
 
-            campaign = session.scalar(
+            campaign = await session.scalar(
                 select(CampaignTable).filter_by(
                     guild_id=ctx.guild_id, name=campaign_name
                 )
@@ -316,7 +321,9 @@ class Campaign(Cog):
                 return
 
             campaign.actor_ids.append(pc_id)
-            session.commit()
+            await session.flush()
+            await refresh_xp_ledger(session, ctx.guild_id, [pc_id])
+            await session.commit()
 
         await ctx.respond(
             f"**{actor_name}** added to **{campaign_name}**.", ephemeral=True
@@ -342,8 +349,8 @@ class Campaign(Cog):
     async def campaign_remove_pc(
         self, ctx: ApplicationContext, campaign_name: str, actor_name: str
     ):
-        with Session() as session:
-            pc_id = session.scalar(
+        async with AsyncSession() as session:
+            pc_id = await session.scalar(
                 select(ActorTable.id).filter_by(guild_id=ctx.guild_id, name=actor_name)
             )
             if not pc_id:
@@ -352,7 +359,7 @@ class Campaign(Cog):
                 )
                 return
 
-            campaign = session.scalar(
+            campaign = await session.scalar(
                 select(CampaignTable).filter_by(
                     guild_id=ctx.guild_id, name=campaign_name
                 )
@@ -374,7 +381,9 @@ class Campaign(Cog):
                 return
 
             campaign.actor_ids.remove(pc_id)
-            session.commit()
+            await session.flush()
+            await refresh_xp_ledger(session, ctx.guild_id, [pc_id])
+            await session.commit()
 
         await ctx.respond(f'**{actor_name}** removed from **{campaign_name}**.', ephemeral=True)
 
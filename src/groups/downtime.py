@@ -47,10 +47,10 @@ class Downtime(discord.Cog):
             self.bot.add_view(DowntimeGmView(downtime_table))
 
     @staticmethod
-    def common(
+    async def common(
         character: str, ctx: discord.ApplicationContext
     ) -> Tuple[GuildSettings, Actor, dict]:
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if guild_settings.subscription == Subscription.none:
             return (
                 None,
@@ -72,7 +72,7 @@ class Downtime(discord.Cog):
                 ),
             )
 
-        return guild_settings, *get_actor(character, ctx.user.id, ctx.guild_id)
+        return guild_settings, *await get_actor(character, ctx.user.id, ctx.guild_id)
 
     if system.ENABLED:
 
@@ -87,7 +87,7 @@ class Downtime(discord.Cog):
         @option(
             "item",
             description="Item to Buy",
-            autocomplete=lambda ctx: search(ctx.value, items.shoppable_items, sorted),
+            autocomplete=lambda ctx: search(ctx.value, items.shoppable_item_index, sorted),
         )
         @option(
             "extra_weeks",
@@ -110,7 +110,7 @@ class Downtime(discord.Cog):
             extra_gold: int,
             item: str,
         ):
-            guild_settings, actor, error = self.common(character, ctx)
+            guild_settings, actor, error = await self.common(character, ctx)
             if error:
                 await ctx.respond(**error)
                 return
@@ -144,7 +144,8 @@ class Downtime(discord.Cog):
                 consumable = (item_actual and item_actual["consumable"]) or any(
                     i in item.lower() for i in ["potion", "scroll"]
                 )
-                price_string = get_item_price_string(item, consumable)
+                await ctx.defer()
+                price_string = await get_item_price_string(item, consumable)
             else:
                 roll_string = f"{str(roll)} < DC **{dc}**"
                 price_string = f"Failed DC for {item}!"
@@ -176,7 +177,7 @@ class Downtime(discord.Cog):
     async def command_downtime_fight(
         self, ctx: discord.ApplicationContext, character: str
     ):
-        guild_settings, actor, error = self.common(character, ctx)
+        guild_settings, actor, error = await self.common(character, ctx)
         if error:
             await ctx.respond(**error)
             return
@@ -231,7 +232,7 @@ class Downtime(discord.Cog):
     async def command_downtime_crime(
         self, ctx: discord.ApplicationContext, character: str, dc: int
     ):
-        guild_settings, actor, error = self.common(character, ctx)
+        guild_settings, actor, error = await self.common(character, ctx)
         if error:
             await ctx.respond(**error)
             return
@@ -288,7 +289,7 @@ class Downtime(discord.Cog):
     async def command_downtime_gamble(
         self, ctx: discord.ApplicationContext, character: str, ante: int
     ):
-        guild_settings, actor, error = self.common(character, ctx)
+        guild_settings, actor, error = await self.common(character, ctx)
         if error:
             await ctx.respond(**error)
             return
@@ -18,7 +18,7 @@ from database.db_utils import delete_guild, delete_member
 from database.guild_settings_table import GuildSettingsTable
 from database.missions import MissionTable, edit_mission
 from groups import get_actors, foundry_module_link
-from models.actor import Actor
+from models.actor import ActorSummary
 from models.missions import Mission
 from models.socket_aware_bot import SocketAwareBot
 from utils import beta_tester_role_id, getLogger, oronder_server_id, supporter_role_id
@@ -29,7 +29,7 @@ logger = getLogger(__name__)
 
 @dataclass
 class ScheduledEventContext:
-    actors: List[Actor]
+    actors: List[ActorSummary]
     mission: Mission
     user: Member
     scheduled_event: ScheduledEvent
@@ -72,7 +72,7 @@ class Events(Cog):
             )
         ):
             for guild in [g for g in self.bot.guilds if g.owner_id == after.id]:
-                GuildSettingsTable.update_subscription(self.bot, guild)
+                await GuildSettingsTable.update_subscription(self.bot, guild)
 
     @Cog.listener()
     async def on_scheduled_event_update(self, before, after):
@@ -122,7 +122,7 @@ class Events(Cog):
             logger.warning(f"{event_subscription=}")
             return
 
-        sec: ScheduledEventContext = self.event_to_actors(event_subscription)
+        sec: ScheduledEventContext = await self.event_to_actors(event_subscription)
         if sec:
             a_ids = [a.id for a in sec.actors]
             if any(
@@ -168,7 +168,7 @@ class Events(Cog):
     ):
         if not event_subscription:
             logger.warning(f"{event_subscription=}")
-        sec: ScheduledEventContext = self.event_to_actors(event_subscription)
+        sec: ScheduledEventContext = await self.event_to_actors(event_subscription)
         if sec:
             a_ids = [a.id for a in sec.actors]
             sec.mission.pcs = [a_id for a_id in sec.mission.pcs if a_id not in a_ids]
@@ -177,7 +177,7 @@ class Events(Cog):
             ]
             await edit_mission(event_subscription.guild, sec.mission)
 
-    def event_to_actors(
+    async def event_to_actors(
         self, event_subscription: RawScheduledEventSubscription
     ) -> Optional[ScheduledEventContext]:
         scheduled_event = event_subscription.guild.get_scheduled_event(
@@ -224,8 +224,10 @@ class Events(Cog):
             )
             return None
 
-        actors: List[Actor]
-        actors, error = get_actors(user.id, event_subscription.guild.id)
+        actors: List[ActorSummary]
+        actors, error = await get_actors(
+            user.id, event_subscription.guild.id, ActorSummary
+        )
         if error:
             logger.warning(
                 f"Error finding {user.display_name}'s Actor for {event_subscription.guild.name}'s {scheduled_event.name}!"
@@ -23,6 +23,7 @@ from groups.autocomplete import (
     mission_remove_autocomplete,
     mission_info_autocomplete,
 )
+from models.actor import ActorSummary
 from models.missions import Mission
 from utils import getLogger
 
@@ -61,6 +62,7 @@ class Game(Cog):
                 )
                 actors = (
                     session.query(ActorTable)
+                    .options(ActorTable.projection(ActorSummary))
                     .filter_by(guild_id=ctx.guild_id)
                     .filter(ctx.interaction.user.id == any_(ActorTable.discord_ids))
                     .filter(ActorTable.id.in_([*mission.pcs, *mission.pcs_standby]))
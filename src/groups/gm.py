@@ -23,11 +23,12 @@ from sqlalchemy.exc import NoResultFound
 from tabulate import tabulate
 
 import system
-from database import Session, CampaignTable, XpAdjustmentsTable
+from database import Session, AsyncSession, CampaignTable, XpAdjustmentsTable
 from database.actor_table import ActorTable
 from database.game_master_table import GameMasterTable
 from database.guild_settings_table import GuildSettingsTable
 from database.missions import MissionTable, edit_mission, upsert_mission
+from database.xp_ledger import refresh_xp_ledger
 from system.items import format_number
 from system.rules import get_lvl, lvl_to_xp
 from groups import (
@@ -61,19 +62,19 @@ from groups.lookups import lookup_character
 #     summarize, anthropic_models, openai_models, openai_embeddings, voyage_embeddings, default_model
 # )
 from models import CampaignModel
-from models.actor import Actor
+from models.actor import Actor, ActorSummary
 from models.guild_settings import Subscription
 from models.mission_event_manager import MissionEventManager
 from models.missions import Mission
 from models.socket_aware_bot import SocketAwareBot
 from utils import (
-    get_image_bytes,
     respond_with_long_embed,
     parse_time,
     NOT_FOUND,
     getLogger,
     join_list,
 )
+from utils.ImageFetcher import image_fetcher
 from views.schedule_modal import ScheduleModal
 
 logger = getLogger(__name__)
@@ -162,10 +163,14 @@ class GM(Cog):
             mission.created_thread() and ctx.channel_id == channel_or_thread.id
         )
         try:
-            with Session() as session:
-                mission = session.scalar(stmt)
-                session.delete(mission)
-                session.commit()
+            async with AsyncSession() as session:
+                mission = await session.scalar(stmt)
+                await session.delete(mission)
+                await session.flush()
+                await refresh_xp_ledger(
+                    session, ctx.guild_id, [*mission.pcs, mission.gm_pc]
+                )
+                await session.commit()
         except NoResultFound as e:
             logger.error(str(e))
             errors.append("Records not found.")
@@ -201,7 +206,7 @@ class GM(Cog):
     async def game_continue(
         self, ctx: ApplicationContext, game: str, date_time: str, hook: str
     ):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         mission, mission_error = get_mission_for_edit(game, ctx)
         if mission_error:
             await ctx.respond(**mission_error)
@@ -243,7 +248,7 @@ class GM(Cog):
                 await ctx.respond(scheduled_event_error, ephemeral=True)
                 return
 
-        err = upsert_mission(
+        err = await upsert_mission(
             ctx.guild, mission, add_event_fun=self.mission_event_manager.upsert
         )
 
@@ -330,7 +335,7 @@ class GM(Cog):
             await ctx.respond("No changes selected.", ephemeral=True)
             return
 
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         mission, mission_error = get_mission_for_edit(game, ctx)
         if mission_error:
             await ctx.respond(**mission_error)
@@ -374,7 +379,7 @@ class GM(Cog):
             with Session() as session:
                 if mission.gm_pc:
                     old_pc_name: str | None = (
-                        session.query(ActorTable)
+                        session.query(ActorTable.name)
                         .where(
                             and_(
                                 ActorTable.guild_id == ctx.guild_id,
@@ -382,14 +387,14 @@ class GM(Cog):
                                 ctx.interaction.user.id == any_(ActorTable.discord_ids),
                             )
                         )
-                        .one()
-                        .name
+                        .scalar()
                     )
                 else:
                     old_pc_name = None
                 try:
                     new_pc: ActorTable = (
                         session.query(ActorTable)
+                        .options(ActorTable.projection(ActorSummary))
                         .where(
                             and_(
                                 ActorTable.guild_id == ctx.guild_id,
@@ -454,7 +459,7 @@ class GM(Cog):
                 embed.add_field(name="Gold", value=f"**{mission.gold}** -> **{gold}**")
                 mission.gold = gold
 
-        image_bytes = get_image_bytes(image_url)
+        image_bytes = await image_fetcher.get_image_bytes(image_url)
         if image_url:
             if not image_bytes:
                 errors.append(f"{image_url} is not a valid image url.")
@@ -514,7 +519,7 @@ class GM(Cog):
             )
             return
 
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
 
         mission.xp = xp
         mission.gold = gold
@@ -529,15 +534,20 @@ class GM(Cog):
 
         await ctx.respond(f"{out_str or 'Nothing'} rewarded for **{game}**!")
 
+        actors = mission.get_actors()
+        actor_ids_to_xp_before = await Actor.get_exps(
+            guild_settings, [a.id for a in actors]
+        )
         actors_names_to_levels_before = {
-            a.name: get_lvl(a.get_exp(guild_settings)) for a in mission.get_actors()
+            a.name: get_lvl(actor_ids_to_xp_before[a.id]) for a in actors
         }
         await edit_mission(ctx.guild, mission)
 
         if xp:
-            name_id_xp = [
-                [a.name, a.id, a.get_exp(guild_settings)] for a in mission.get_actors()
-            ]
+            actor_ids_to_xp = await Actor.get_exps(
+                guild_settings, actor_ids_to_xp_before.keys()
+            )
+            name_id_xp = [[a.name, a.id, actor_ids_to_xp[a.id]] for a in actors]
             actor_names_to_levels = {name: get_lvl(xp) for [name, _, xp] in name_id_xp}
 
             out_str = "\n".join(
@@ -577,7 +587,7 @@ class GM(Cog):
             )
             return
 
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
@@ -591,8 +601,8 @@ class GM(Cog):
             )
             return
 
-        with Session() as session:
-            pc_id = session.scalar(
+        async with AsyncSession() as session:
+            pc_id = await session.scalar(
                 select(ActorTable.id).filter_by(guild_id=ctx.guild_id, name=actor_name)
             )
             session.add(
@@ -604,7 +614,9 @@ class GM(Cog):
                     date=date.today(),
                 )
             )
-            session.commit()
+            await session.flush()
+            await refresh_xp_ledger(session, ctx.guild_id, [pc_id])
+            await session.commit()
 
             await ctx.respond(
                 f"`{abs(xp)}` XP {'added to' if xp > 0 else 'subtracted from'} **{actor_name}** for *{comment}.*",
@@ -628,7 +640,7 @@ class GM(Cog):
     async def undo_reward_exp_actor(
         self, ctx: ApplicationContext, actor_name: str, comment: str
     ):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
@@ -658,10 +670,12 @@ class GM(Cog):
             )
         )
 
-        with Session() as session:
-            adjustment = session.scalar(stmt)
-            session.delete(adjustment)
-            session.commit()
+        async with AsyncSession() as session:
+            adjustment = await session.scalar(stmt)
+            await session.delete(adjustment)
+            await session.flush()
+            await refresh_xp_ledger(session, ctx.guild_id, [adjustment.actor_id])
+            await session.commit()
 
         await ctx.respond(
             f"XP Adjustment **{comment}** removed from **{actor_name}**", ephemeral=True
@@ -675,7 +689,7 @@ class GM(Cog):
         autocomplete=actor_gm_autocomplete,
     )
     async def explain_exp_actor(self, ctx: ApplicationContext, actor_name: str):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
@@ -691,9 +705,11 @@ class GM(Cog):
             return
 
         with Session() as session:
-            actor = Actor.model_validate(
+            actor = ActorSummary.model_validate(
                 session.scalar(
-                    select(ActorTable).filter_by(guild_id=ctx.guild_id, name=actor_name)
+                    select(ActorTable)
+                    .options(ActorTable.projection(ActorSummary))
+                    .filter_by(guild_id=ctx.guild_id, name=actor_name)
                 )
             )
             adjustments = session.scalars(
@@ -749,7 +765,7 @@ class GM(Cog):
             key=lambda x: x["date"],
         )
 
-        xp_total = actor.get_exp(guild_settings)
+        xp_total = await actor.get_exp(guild_settings)
         tabular_data = [
             [starting_xp_label, lvl_to_xp[starting_lvl]],
             *[[x["name"], x["xp"]] for x in xp_sources],
@@ -790,7 +806,7 @@ class GM(Cog):
         campaign: str | None = None,
         channel: Thread | TextChannel | None = None,
     ):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
@@ -1040,7 +1056,7 @@ class GM(Cog):
     )
     @option("skill", autocomplete=skill_autocomplete)
     async def passive_check(self, ctx: ApplicationContext, skill):
-        guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+        guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
         if not guild_settings:
             await ctx.respond(**logger.err_msg(no_init_err_msg, ctx.guild_id))
             return
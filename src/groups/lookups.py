@@ -13,9 +13,9 @@ from discord.commands import option
 import system
 from database.guild_settings_table import GuildSettingsTable
 from discord_markdown_converter import md
-from system import SKILLS, TOOLS, mod_to_str, items
+from system import SKILLS, TOOLS, mod_to_str, items, feats
 from system.backgrounds import generate_background_embed
-from system.feats import generate_feat_embed, feats
+from system.feats import generate_feat_embed
 from system.items import generate_item_embed, format_number
 from system.rules import generate_rule_embed
 from system.spells import generate_spell_embed
@@ -60,7 +60,7 @@ class Lookups(Cog):
         @option(
             "item",
             description="The item you want to look up",
-            autocomplete=lambda ctx: search(ctx.value, items.shoppable_items),
+            autocomplete=lambda ctx: search(ctx.value, items.shoppable_item_index),
         )
         @option(
             "display",
@@ -69,7 +69,7 @@ class Lookups(Cog):
             choices=display_choices,
         )
         async def item_lookup(self, ctx: ApplicationContext, item: str, display: str):
-            embed, error = generate_item_embed(item)
+            embed, error = await generate_item_embed(item)
             if embed:
                 await ctx.respond(embed=embed, ephemeral=display == DISPLAY_PRIVATE)
             else:
@@ -79,7 +79,7 @@ class Lookups(Cog):
         @option(
             "feat",
             description="The feat you want to look up",
-            autocomplete=lambda ctx: search(ctx.value, feats.keys()),
+            autocomplete=lambda ctx: search(ctx.value, feats.feat_index),
         )
         @option(
             "display",
@@ -178,7 +178,7 @@ async def lookup_character(
     socket_namespace: SocketNamespace,
     gm=False,
 ):
-    guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+    guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
     if guild_settings.subscription == Subscription.none:
         await ctx.respond(
             **logger.err_msg(
@@ -188,7 +188,7 @@ async def lookup_character(
         )
         return
 
-    actor, error = get_actor(character, ctx.user.id, ctx.guild_id, gm)
+    actor, error = await get_actor(character, ctx.user.id, ctx.guild_id, gm)
     if error:
         await ctx.respond(**error)
         return
@@ -252,7 +252,8 @@ async def lookup_character(
 
     else:
         embed.add_field(
-            name="XP", value=format_number(actor.get_exp(guild_settings), "XP")
+            name="XP",
+            value=format_number(await actor.get_exp(guild_settings), "XP"),
         )
 
         embed.set_thumbnail(url=actor.portrait_url)
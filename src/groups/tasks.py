@@ -16,7 +16,7 @@ class Tasks(discord.Cog):
     async def set_subscriber_status(self):
         await self.bot.wait_until_ready()
         for guild in self.bot.guilds:
-            GuildSettingsTable.update_subscription(self.bot, guild)
+            await GuildSettingsTable.update_subscription(self.bot, guild)
 
 
 def setup(bot: Bot):
@@ -16,7 +16,7 @@ from system import (
     OTHER_ROLLABLES_NAME_TO_ABRV,
 )
 from system.items import attack_modes
-from system.rules import actions
+from system import rules
 from groups import get_actor, DISPLAY_PRIVATE, invite_link
 from models.actor import Spell
 from models.guild_settings import Subscription
@@ -34,7 +34,7 @@ async def roll(
     save: bool,
     socket_namespace: SocketNamespace,
 ):
-    actor, error = get_actor(character, ctx.user.id, ctx.guild_id)
+    actor, error = await get_actor(character, ctx.user.id, ctx.guild_id)
     if error:
         await ctx.respond(**error)
         return
@@ -78,7 +78,7 @@ async def roll(
             ephemeral=ephemeral,
         )
 
-    guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+    guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
     if guild_settings.roll_discord_to_foundry:
         # Defer the interaction to avoid 'Unknown interaction' if Foundry takes >3s
         try:
@@ -114,7 +114,7 @@ async def roll_attack(
     spell_level: int | None,
     attack_mode: str | None,
 ):
-    actor, error = get_actor(actor_name, ctx.interaction.user.id, ctx.guild_id)
+    actor, error = await get_actor(actor_name, ctx.interaction.user.id, ctx.guild_id)
     if error:
         await ctx.respond(**error)
         return
@@ -157,7 +157,7 @@ async def roll_attack(
 
         await ctx.respond(embed=embed)
 
-    guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+    guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
     if guild_settings.roll_discord_to_foundry:
         # Defer the interaction to avoid 'Unknown interaction' if Foundry takes >3s
         try:
@@ -218,7 +218,7 @@ async def action(
     comment: str,
     display_description: bool,
 ):
-    guild_settings = GuildSettingsTable.lookup(ctx.guild_id)
+    guild_settings = await GuildSettingsTable.lookup(ctx.guild_id)
     if guild_settings.subscription == Subscription.none:
         await ctx.respond(
             **logger.err_msg(
@@ -228,7 +228,7 @@ async def action(
         )
         return
 
-    actor, error = get_actor(actor_name, ctx.user.id, ctx.guild_id)
+    actor, error = await get_actor(actor_name, ctx.user.id, ctx.guild_id)
     if error:
         await ctx.respond(**error)
         return
@@ -239,7 +239,7 @@ async def action(
         color=discord.Color.red() if actor.details.dead else None,
     )
 
-    description = actions[action_type]
+    description = rules.actions[action_type]
     times = [
         t
         if isinstance(t, str)
@@ -0,0 +1,144 @@
+"""
+Async client for the 5emagic.shop item price lookup.
+
+Requests share one pooled connection and a per request timeout. Results, including searches that matched nothing,
+are cached and saved to cache/ on shutdown, and a circuit breaker stops sending requests for a while once the
+shop keeps failing, so a loot roll never waits on a site that is down.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+import httpx
+import msgspec
+
+from utils import cache_dir, getLogger
+from utils.CircuitBreaker import CircuitBreaker
+from utils.TtlLruCache import TtlLruCache
+
+logger = getLogger(__name__)
+
+_url = os.getenv("MAGIC_SHOP_URL", "https://5emagic.shop")
+# well inside the 3s an interaction has to be answered in, for the commands that don't defer
+_timeout = float(os.getenv("MAGIC_SHOP_TIMEOUT", 2))
+_path = cache_dir / "magic_shop_prices.msgpack"
+
+# searches matching nothing, or more than one item, are retried sooner in case the shop adds the item
+_negative_ttl = 60 * 60
+magic_shop_prices = TtlLruCache("magic_shop_prices", maxsize=4096, ttl=24 * 60 * 60)
+magic_shop_breaker = CircuitBreaker("magic_shop", threshold=5, cooldown=60)
+
+_client: httpx.AsyncClient | None = None
+_pending: Dict[str, asyncio.Task] = {}
+_restored = False
+
+
+class _Entry(msgspec.Struct, array_like=True):
+    item_name: str
+    # wall clock, monotonic time doesn't survive a restart
+    expires_at: float
+    prices: List[str | int | None]
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=_url,
+            timeout=_timeout,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _client
+
+
+def _restore():
+    global _restored
+    if _restored:
+        return
+    _restored = True
+    try:
+        saved = msgspec.msgpack.decode(_path.read_bytes(), type=List[_Entry])
+    except FileNotFoundError:
+        return
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        logger.warning(f"Ignoring unreadable {_path.name}: {e}")
+        return
+    now = time.time()
+    for e in saved:
+        if e.expires_at > now:
+            magic_shop_prices.set(e.item_name, e.prices, ttl=e.expires_at - now)
+
+
+def save():
+    now = time.time()
+    entries = [
+        _Entry(item_name, now + seconds_left, prices)
+        for item_name, prices, seconds_left in magic_shop_prices.entries()
+    ]
+    _path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _path.with_suffix(".tmp")
+    tmp.write_bytes(msgspec.msgpack.encode(entries))
+    os.replace(tmp, _path)
+
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _fetch(item_name: str) -> List[str | int | None] | None:
+    if not magic_shop_breaker.allow():
+        return None
+
+    success = False
+    try:
+        # httpx times each phase separately, this bounds the whole request
+        async with asyncio.timeout(_timeout):
+            response = await _get_client().get(
+                "/api/item-lookup", params={"search": item_name}
+            )
+        if not response.is_success:
+            logger.error(
+                f"{response.status_code} {response.reason_phrase} {response.url}"
+            )
+            return None
+        prices = [i.get("price") for i in response.json()]
+        success = True
+    except (httpx.HTTPError, ValueError, TimeoutError) as e:
+        logger.error(f"5emagic.shop lookup for {item_name} failed: {e!r}")
+        return None
+    finally:
+        # a cancelled lookup counts as a failure too, so a half open breaker never waits on it forever
+        magic_shop_breaker.record(success)
+
+    magic_shop_prices.set(
+        item_name, prices, ttl=None if len(prices) == 1 else _negative_ttl
+    )
+    return prices
+
+
+def answered(item_name: str) -> bool:
+    """Whether the shop's answer for item_name is cached, false while it was unreachable or the breaker is open."""
+    return item_name in magic_shop_prices
+
+
+async def item_prices(item_name: str) -> List[str | int | None] | None:
+    """
+    Price of every item 5emagic.shop matches item_name to, or None when the shop could not be reached.
+    Concurrent lookups of the same name share one request.
+    """
+    _restore()
+    prices = magic_shop_prices.get(item_name)
+    if prices is not TtlLruCache.MISS:
+        return prices
+
+    task = _pending.get(item_name)
+    if task is None:
+        task = asyncio.create_task(_fetch(item_name))
+        _pending[item_name] = task
+        task.add_done_callback(lambda _: _pending.pop(item_name, None))
+    return await asyncio.shield(task)
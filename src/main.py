@@ -9,7 +9,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
 
 import discord_client
-from database import init_db
+from database import init_db, async_engine
+from database.migrations import run_migrations
 from routers import foundry_api, admin_api
 from routers.socket_io import sio
 from utils import getLogger, init_logger
@@ -24,6 +25,8 @@ logger = getLogger(__name__)
 async def lifespan(a: FastAPI):
     logger.critical("Initializing Database")
     init_db()
+    logger.critical("Running Migrations")
+    run_migrations()
     logger.critical("Launching Discord Client")
     logger.critical(f"Log Level is <{logging.getLevelName(logger.level)}>")
     discord_task = asyncio.create_task(discord_client.start())
@@ -40,9 +43,12 @@ async def lifespan(a: FastAPI):
 
     yield
     logger.critical("SHUTTING DOWN")
-    await wikijs_task_queue.stop_worker
-    await discord_client.stop()
-    discord_task.cancel()
+    try:
+        await wikijs_task_queue.stop_worker()
+    finally:
+        await discord_client.stop()
+        discord_task.cancel()
+        await async_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
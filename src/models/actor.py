@@ -1,14 +1,19 @@
 import html as _html
-import textwrap
-from typing import List, Optional, Literal, Any, Annotated, Tuple
+from typing import List, Optional, Literal, Any, Annotated, Tuple, Iterable, Dict
 
 import d20
 from d20 import RollResult
-from discord.utils import snowflake_time
-from pydantic import Field, AliasChoices, BeforeValidator, field_validator
-from sqlalchemy import text, any_, func, select, TextClause
-
-from database import Session, CampaignTable, XpAdjustmentsTable
+from pydantic import (
+    Field,
+    AliasChoices,
+    BeforeValidator,
+    field_validator,
+    model_validator,
+)
+from sqlalchemy import select
+
+from database import AsyncSession
+from database.xp_ledger import XpLedgerTable, refresh_xp_ledger
 from system import STAT_NAME_TO_ABRV, STAT_ABRV_TO_NAME, TOOLS
 from system.items import attack_modes_machine, calculate_average_damage
 from system.rules import lvl_to_xp
@@ -330,6 +335,13 @@ def validate_weapons(weapons: Any) -> Any:
         return validated_weapons
 
 
+def _desc_string(race: str, classes: dict) -> str:
+    return f"""{race.split("(")[0].rstrip()} {"/".join([f"{k.title()} {v['levels']}" for k, v in classes.items()])}"""
+
+
+summary_passives = ("prc", "ins", "inv")
+
+
 class Actor(OronderBaseModel):
     currency: Currency
     abilities: Abilities
@@ -493,7 +505,17 @@ class Actor(OronderBaseModel):
     """
 
     def desc_string(self):
-        return f"""{self.details.race.split("(")[0].rstrip()} {"/".join([f"{k.title()} {v['levels']}" for k, v in self.classes.items()])}"""
+        return _desc_string(self.details.race, self.classes)
+
+    def to_summary(self) -> dict:
+        """Values ActorSummary needs from the cold columns, stored in actors.summary."""
+        return {
+            "level": self.details.level,
+            "race": self.details.race,
+            "ac": self.attributes.ac.get("value"),
+            "hp": self.attributes.hp.max,
+            "passives": {k: getattr(self.skills, k).passive for k in summary_passives},
+        }
 
     def markdown_sheet(self) -> str:
         """
@@ -1241,46 +1263,82 @@ class Actor(OronderBaseModel):
             (True for i in self.details.items if i.name == "Halfling Lucky"), False
         )
 
-    def get_exp(self, guild_settings: GuildSettings) -> int:
-        with Session() as session:
-            earned = session.scalar(_mission_xp_query(self.id, guild_settings.id)) or 0
+    async def get_exp(self, guild_settings: GuildSettings) -> int:
+        return (await Actor.get_exps(guild_settings, [self.id]))[self.id]
 
-            adjustments = (
-                session.scalar(
-                    select(func.sum(XpAdjustmentsTable.xp)).where(
-                        (XpAdjustmentsTable.guild_id == guild_settings.id)
-                        & (XpAdjustmentsTable.actor_id == self.id)
-                    )
+    @staticmethod
+    async def get_exps(
+        guild_settings: GuildSettings, actor_ids: Iterable[str]
+    ) -> Dict[str, int]:
+        """XP for every actor in actor_ids in one round trip."""
+        actor_ids = set(actor_ids)
+        if not actor_ids:
+            return {}
+
+        stmt = select(XpLedgerTable).where(
+            XpLedgerTable.guild_id == guild_settings.id,
+            XpLedgerTable.actor_id.in_(actor_ids),
+        )
+        async with AsyncSession() as session:
+            ledgers = {ledger.actor_id: ledger for ledger in await session.scalars(stmt)}
+            missing = actor_ids - ledgers.keys()
+            if missing:
+                # first lookup for these actors since the ledger was introduced
+                await refresh_xp_ledger(session, guild_settings.id, missing)
+                await session.commit()
+                ledgers.update(
+                    {
+                        ledger.actor_id: ledger
+                        for ledger in await session.scalars(
+                            stmt.where(XpLedgerTable.actor_id.in_(missing))
+                        )
+                    }
                 )
-                or 0
-            )
 
-            campaigns = session.scalars(
-                select(CampaignTable).filter(
-                    (CampaignTable.guild_id == guild_settings.id) &
-                    (any_(CampaignTable.actor_ids) == self.id)
-                )
-            ).all()
+        return {
+            actor_id: lvl_to_xp[ledger.starting_level or guild_settings.starting_level]
+            + ledger.mission_xp
+            + ledger.adjustment_xp
+            for actor_id, ledger in ledgers.items()
+        }
 
-            if campaigns:
-                first_campaign_group: CampaignTable = min(campaigns, key=lambda campaign: snowflake_time(campaign.id))
-                starting_lvl = first_campaign_group.starting_level
-            else:
-                starting_lvl = guild_settings.starting_level
 
-        out = lvl_to_xp[starting_lvl] + earned + adjustments
-        return out
+class ActorSummary(OronderBaseModel):
+    """
+    Hot projection of an actor, loaded without the JSONB sheet columns.
+    Enough for rosters, embeds and sign ups. Use Actor when rolling or rendering a sheet.
+    """
+
+    id: str
+    name: str
+    discord_ids: List[int]
+    portrait_url: Optional[str] = None
+    classes: dict
+    level: int = 0
+    race: str = ""
+    ac: Optional[int] = None
+    hp: Optional[int] = None
+    passives: Dict[str, Optional[int]] = {}
 
+    @model_validator(mode="before")
+    @classmethod
+    def flatten_summary(cls, data: Any) -> Any:
+        if isinstance(data, dict):
+            return data
+        return {
+            "id": data.id,
+            "name": data.name,
+            "discord_ids": data.discord_ids,
+            "portrait_url": data.portrait_url,
+            "classes": data.classes or {},
+            **(data.summary or {}),
+        }
+
+    def first_name(self):
+        return self.name.split(" ")[0]
+
+    def desc_string(self):
+        return _desc_string(self.race, self.classes)
 
-def _mission_xp_query(pc_id: str, guild_id: int) -> TextClause:
-    return text(textwrap.dedent(f"""
-        select sum(q.xp) as xp from (
-            select unnest(pcs::text[]) as pc, xp 
-            from missions where guild_id={guild_id}
-            union all
-            select gm_pc as pc, gm_xp as xp 
-            from missions where guild_id={guild_id}
-        ) as q 
-        where pc='{pc_id}'
-        group by pc
-    """))
+    async def get_exp(self, guild_settings: GuildSettings) -> int:
+        return (await Actor.get_exps(guild_settings, [self.id]))[self.id]
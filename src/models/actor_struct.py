@@ -0,0 +1,290 @@
+"""
+msgspec mirror of models.actor.Actor for hot paths that only need the data.
+Decoding with these is several times faster than Actor.model_validate and
+to_dict() is identical, see GET /admin/actor_codec.
+Keep it in step with models/actor.py.
+"""
+
+from typing import List, Optional, Literal, Any, Union
+
+import msgspec
+
+from models.actor import summary_passives, _desc_string
+from system.items import attack_modes_machine
+
+
+class CurrencyStruct(msgspec.Struct):
+    pp: int
+    gp: int
+    ep: int
+    sp: int
+    cp: int
+
+
+class AbilityBonusesStruct(msgspec.Struct):
+    check: str
+    save: str
+    skill: str
+
+
+class BonusesStruct(msgspec.Struct):
+    mwak: dict
+    rwak: dict
+    msak: dict
+    rsak: dict
+    abilities: AbilityBonusesStruct
+    spell: dict
+
+
+class RollableStruct(msgspec.Struct, kw_only=True):
+    total: Optional[int] = None
+    save: Optional[int] = None
+    mod: Optional[int] = None
+
+
+class SkillStruct(RollableStruct, kw_only=True):
+    value: float
+    ability: str
+    bonus: int
+    proficient: float
+    passive: int
+
+
+class SkillsStruct(msgspec.Struct):
+    acr: SkillStruct
+    ani: SkillStruct
+    arc: SkillStruct
+    ath: SkillStruct
+    dec: SkillStruct
+    his: SkillStruct
+    ins: SkillStruct
+    itm: SkillStruct
+    inv: SkillStruct
+    med: SkillStruct
+    nat: SkillStruct
+    prc: SkillStruct
+    prf: SkillStruct
+    per: SkillStruct
+    rel: SkillStruct
+    slt: SkillStruct
+    ste: SkillStruct
+    sur: SkillStruct
+
+
+class AbilityStruct(RollableStruct, kw_only=True):
+    value: int
+    proficient: int
+    saveBonus: int
+    checkBonus: int
+    save: int
+    dc: int
+
+
+class AbilitiesStruct(msgspec.Struct):
+    str: AbilityStruct
+    dex: AbilityStruct
+    con: AbilityStruct
+    int: AbilityStruct
+    wis: AbilityStruct
+    cha: AbilityStruct
+
+
+class HpStruct(msgspec.Struct):
+    max: int
+
+
+class AttributesStruct(msgspec.Struct, kw_only=True):
+    hp: HpStruct
+    movement: dict
+    attunement: dict
+    senses: dict
+    spellcaster: int = -1
+    init: Optional[RollableStruct] = None
+    spellcasting: str
+    ac: dict
+    exhaustion: int
+    inspiration: bool
+    prof: int
+    spelldc: int
+    spellmod: int
+
+
+class XpStruct(msgspec.Struct):
+    value: int
+    max: int
+
+
+class BiographyStruct(msgspec.Struct):
+    value: str
+    public: str
+
+
+class ItemStruct(msgspec.Struct, kw_only=True):
+    name: str
+    img: Optional[str] = None
+    id: str
+    type: Literal[
+        "background",
+        "feat",
+        "equipment",
+        "container",
+        "class",
+        "loot",
+        "consumable",
+        "weapon",
+        "race",
+        "spell",
+        "subclass",
+        "tool",
+    ]
+
+
+# Weapon and Spell carry "type" as the union tag instead of a field
+class AttackStruct(msgspec.Struct, kw_only=True):
+    name: str
+    img: Optional[str] = None
+    id: str
+    attack: str
+
+
+class WeaponStruct(AttackStruct, tag="weapon", tag_field="type", kw_only=True):
+    attack_modes: List[str]
+
+    def __post_init__(self):
+        self.attack_modes = [i for i in self.attack_modes if i in attack_modes_machine]
+
+
+class SpellStruct(AttackStruct, tag="spell", tag_field="type", kw_only=True):
+    level: int
+
+
+class DetailsStruct(msgspec.Struct, kw_only=True):
+    biography: BiographyStruct
+    alignment: str
+    background: str
+    xp: XpStruct
+    appearance: str
+    trait: str
+    ideal: str
+    bond: str
+    flaw: str
+    level: int
+    race: str
+    dead: bool = False
+    items: List[ItemStruct] = []
+
+
+class ToolStruct(RollableStruct, kw_only=True):
+    value: int
+    ability: str
+    bonus: int
+    prof: int = 0
+
+
+class ToolsStruct(msgspec.Struct):
+    alchemist: Optional[ToolStruct] = None
+    brewer: Optional[ToolStruct] = None
+    calligrapher: Optional[ToolStruct] = None
+    carpenter: Optional[ToolStruct] = None
+    cartographer: Optional[ToolStruct] = None
+    cobbler: Optional[ToolStruct] = None
+    cook: Optional[ToolStruct] = None
+    glassblower: Optional[ToolStruct] = None
+    jeweler: Optional[ToolStruct] = None
+    leatherworker: Optional[ToolStruct] = None
+    mason: Optional[ToolStruct] = None
+    painter: Optional[ToolStruct] = None
+    potter: Optional[ToolStruct] = None
+    smith: Optional[ToolStruct] = None
+    tinker: Optional[ToolStruct] = None
+    weaver: Optional[ToolStruct] = None
+    woodcarver: Optional[ToolStruct] = None
+    disg: Optional[ToolStruct] = None
+    forg: Optional[ToolStruct] = None
+    chess: Optional[ToolStruct] = None
+    dice: Optional[ToolStruct] = None
+    card: Optional[ToolStruct] = None
+    herb: Optional[ToolStruct] = None
+    bagpipes: Optional[ToolStruct] = None
+    drum: Optional[ToolStruct] = None
+    dulcimer: Optional[ToolStruct] = None
+    flute: Optional[ToolStruct] = None
+    horn: Optional[ToolStruct] = None
+    lute: Optional[ToolStruct] = None
+    lyre: Optional[ToolStruct] = None
+    panflute: Optional[ToolStruct] = None
+    shawm: Optional[ToolStruct] = None
+    viol: Optional[ToolStruct] = None
+    navg: Optional[ToolStruct] = None
+    pois: Optional[ToolStruct] = None
+    thief: Optional[ToolStruct] = None
+    air: Optional[ToolStruct] = None
+    land: Optional[ToolStruct] = None
+    space: Optional[ToolStruct] = None
+    water: Optional[ToolStruct] = None
+
+
+class WorldStruct(msgspec.Struct):
+    id: str
+    coreVersion: str
+    system: str
+    systemVersion: str
+
+
+AttackUnion = Union[WeaponStruct, SpellStruct]
+
+
+class ActorStruct(msgspec.Struct):
+    currency: CurrencyStruct
+    abilities: AbilitiesStruct
+    bonuses: BonusesStruct
+    skills: SkillsStruct
+    tools: ToolsStruct
+    attributes: AttributesStruct
+    details: DetailsStruct
+    traits: dict
+    classes: dict
+    id: str
+    name: str
+    discord_ids: List[int]
+    # anything that isn't a weapon or spell is dropped, like models.actor.validate_weapons
+    weapons: List[Any]
+    equipment: List[str]
+    portrait_url: str
+    world: Optional[WorldStruct] = None
+
+    def __post_init__(self):
+        self.weapons = [
+            msgspec.convert(w, AttackUnion, strict=False) if isinstance(w, dict) else w
+            for w in self.weapons
+            if isinstance(w, (WeaponStruct, SpellStruct))
+            or (isinstance(w, dict) and w.get("type") in ("weapon", "spell"))
+        ]
+
+    @staticmethod
+    def decode(data: bytes) -> "ActorStruct":
+        """Raises msgspec.ValidationError or msgspec.DecodeError."""
+        return msgspec.json.decode(data, type=ActorStruct, strict=False)
+
+    @staticmethod
+    def from_row(actor_table) -> "ActorStruct":
+        """Hydrate from a fully loaded ActorTable row."""
+        return msgspec.convert(
+            actor_table, ActorStruct, from_attributes=True, strict=False
+        )
+
+    def to_dict(self) -> dict:
+        return msgspec.to_builtins(self)
+
+    def to_summary(self) -> dict:
+        return {
+            "level": self.details.level,
+            "race": self.details.race,
+            "ac": self.attributes.ac.get("value"),
+            "hp": self.attributes.hp.max,
+            "passives": {k: getattr(self.skills, k).passive for k in summary_passives},
+        }
+
+    def desc_string(self):
+        return _desc_string(self.details.race, self.classes)
+
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Type
 
 import pytz
 from discord import (
@@ -20,10 +20,11 @@ from database.actor_table import ActorTable
 from database.guild_settings_table import GuildSettingsTable
 from system.items import format_number
 from models import CampaignModel
-from models.actor import Actor
+from models.actor import Actor, ActorSummary
 from models.base_model import OronderBaseModel
 from models.systems import System
-from utils import mention_safe, get_image_bytes, getLogger, check_permissions
+from utils import mention_safe, getLogger, check_permissions
+from utils.ImageFetcher import image_fetcher
 
 logger = getLogger(__name__)
 
@@ -61,15 +62,18 @@ class Mission(OronderBaseModel):
             not self.channel_override and self.channel_or_thread_id == self.message_id
         )
 
-    def get_actors(self, standby=False) -> List[Actor]:
+    def get_actors(
+        self, standby=False, model: Type[Actor | ActorSummary] = ActorSummary
+    ) -> List[Actor | ActorSummary]:
         pcs = self.pcs_standby if standby else self.pcs
         if not pcs:
             return []
         try:
             with Session() as session:
                 actors_standby = [
-                    Actor.model_validate(a)
+                    model.model_validate(a)
                     for a in session.query(ActorTable)
+                    .options(ActorTable.projection(model))
                     .filter_by(guild_id=self.guild_id)
                     .filter(ActorTable.id.in_(pcs))
                     .all()
@@ -120,7 +124,7 @@ class Mission(OronderBaseModel):
         level_sum = 0
         for pc in self.get_actors():
             pc_strings.append(f"- {pc.name} | {pc.desc_string()}")
-            level_sum += pc.details.level
+            level_sum += pc.level
         for pc in self.get_actors(standby=True):
             pc_strings.append(f"- *{pc.name} | {pc.desc_string()}*")
         if len(pc_strings):
@@ -155,7 +159,7 @@ class Mission(OronderBaseModel):
         image_bytes: bytes | None = None,
     ) -> Tuple[ScheduledEvent, str]:
         if not image_bytes:
-            image_bytes = get_image_bytes(self.image_url)
+            image_bytes = await image_fetcher.get_image_bytes(self.image_url)
             if self.image_url and not image_bytes:
                 return None, f"{self.image_url} is not a valid image url."
 
@@ -165,7 +169,7 @@ class Mission(OronderBaseModel):
         if campaign:
             voice_channel_id = campaign.voice_channel_id
         else:
-            guild_settings = GuildSettingsTable.lookup(guild.id)
+            guild_settings = await GuildSettingsTable.lookup(guild.id)
             voice_channel_id = guild_settings.voice_channel_id
 
         location: VoiceChannel | StageChannel | str = guild.get_channel(
@@ -5,9 +5,22 @@ from fastapi import Depends, HTTPException, APIRouter, Header, status
 from sqlalchemy import select
 
 import discord_client
-from database import Session
-from database.guild_settings_table import GuildSettingsTable
+from database.xp_ledger import rebuild_xp_ledger
+from groups.autocomplete import autocomplete_deadline, autocomplete_results
+from database.actor_index import actor_index_cache
+from integrations.magic_shop import magic_shop_breaker, magic_shop_prices
+from database.actor_table import check_actor_codecs
+from database import Session, pool_stats
+from database.guild_settings_table import (
+    GuildSettingsTable,
+    guild_settings_cache,
+    auth_token_cache,
+    bad_auth_token_cache,
+)
+from system.catalog import catalog_report
+from system.embed_cache import lookup_embed_cache
 from utils import getLogger
+from utils.ImageFetcher import image_fetcher
 
 logger = getLogger(__name__)
 router = APIRouter(prefix="/admin")
@@ -58,3 +71,79 @@ async def get_bot_info(authorization: str = Header(), bot: Bot = Depends(get_bot
         out.append(guild)
 
     return out
+
+
+@router.get("/db/pool")
+async def get_db_pool(authorization: str = Header()):
+    if not secrets.compare_digest(authorization, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return pool_stats()
+
+
+@router.get("/cache")
+async def get_cache_stats(authorization: str = Header()):
+    if not secrets.compare_digest(authorization, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return {
+        c.name: c.stats()
+        for c in [
+            guild_settings_cache,
+            auth_token_cache,
+            bad_auth_token_cache,
+            actor_index_cache,
+            autocomplete_results,
+            lookup_embed_cache,
+            magic_shop_prices,
+            image_fetcher.urls,
+            image_fetcher.covers,
+        ]
+    }
+
+
+@router.post("/xp_ledger/rebuild")
+async def post_xp_ledger_rebuild(
+    authorization: str = Header(), guild_id: int | None = None
+):
+    if not secrets.compare_digest(authorization, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return await rebuild_xp_ledger(guild_id)
+
+
+@router.get("/actor_codec")
+async def get_actor_codec(
+    authorization: str = Header(), guild_id: int | None = None, limit: int = 100
+):
+    if not secrets.compare_digest(authorization, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return await check_actor_codecs(guild_id, limit)
+
+
+@router.get("/autocomplete")
+async def get_autocomplete_stats(authorization: str = Header()):
+    if not secrets.compare_digest(authorization, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return autocomplete_deadline.to_dict()
+
+
+@router.get("/catalogs")
+async def get_catalogs(authorization: str = Header()):
+    if not secrets.compare_digest(authorization, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return catalog_report()
+
+
+@router.get("/magic_shop")
+async def get_magic_shop(authorization: str = Header()):
+    if not secrets.compare_digest(authorization, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    return {
+        "breaker": magic_shop_breaker.stats(),
+        "prices": magic_shop_prices.stats(),
+    }
@@ -3,20 +3,33 @@ import json
 import os
 import secrets
 from pprint import pformat
-from typing import Annotated
+from typing import Annotated, List
 
 import aiohttp
+import msgspec
 from discord import Bot
-from fastapi import Depends, HTTPException, APIRouter, Query, Header, status, FastAPI
+from fastapi import (
+    Depends,
+    HTTPException,
+    APIRouter,
+    Query,
+    Header,
+    status,
+    FastAPI,
+    Request,
+)
 from fastapi.responses import HTMLResponse
+from sqlalchemy import select, update
 from sqlalchemy.exc import NoResultFound
 
 import discord_client
-from database import Session
+from database import Session, AsyncSession
+from database.actor_index import invalidate_actors
 from database.actor_table import ActorTable
 from database.guild_settings_table import GuildSettingsTable
 from integrations.wikijs import upload_to_wiki, delete_from_wiki
 from models.actor import Actor
+from models.actor_struct import ActorStruct
 from models.guild_settings import (
     GuildSettings,
     GuildSettingsInterface,
@@ -80,15 +93,10 @@ async def guild_auth(
 ) -> GuildSettings:
     if not authorization:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
-    with Session() as session:
-        guild_settings = (
-            session.query(GuildSettingsTable)
-            .filter_by(auth_token=authorization)
-            .one_or_none()
-        )
+    guild_settings = await GuildSettingsTable.lookup_by_auth_token(authorization)
 
     if guild_settings:
-        return GuildSettings.model_validate(guild_settings)
+        return guild_settings
     else:
         logger.error(f"{origin=} {authorization=}")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
@@ -118,16 +126,122 @@ async def update_foundry_module(js: dict, authorization: str = Header()):
         await msg.publish()
 
 
+def decode_actor(data: bytes) -> ActorStruct:
+    try:
+        return ActorStruct.decode(data)
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+
+
 @router.put("/actor")
-async def upsert_actor(
-    actor: Actor, guild_settings=Depends(guild_auth), session=Depends(session_handler)
-):
+async def upsert_actor(request: Request, guild_settings=Depends(guild_auth)):
+    actor = decode_actor(await request.body())
     actor_orm = ActorTable.from_model(actor, guild_settings.id)
-    session.merge(actor_orm)
-    session.commit()
+    async with AsyncSession() as session:
+        existing = (
+            await session.execute(
+                select(ActorTable.content_hash, ActorTable.column_hashes).filter_by(
+                    id=actor_orm.id, guild_id=guild_settings.id
+                )
+            )
+        ).one_or_none()
+
+        if not existing:
+            session.add(actor_orm)
+        elif existing.content_hash == actor_orm.content_hash:
+            return
+        else:
+            previous_hashes = existing.column_hashes or {}
+            changed = {
+                k: getattr(actor_orm, k)
+                for k, v in actor_orm.column_hashes.items()
+                if previous_hashes.get(k) != v
+            }
+            await session.execute(
+                update(ActorTable)
+                .filter_by(id=actor_orm.id, guild_id=guild_settings.id)
+                .values(
+                    **changed,
+                    content_hash=actor_orm.content_hash,
+                    column_hashes=actor_orm.column_hashes,
+                )
+            )
+        await session.commit()
+    invalidate_actors(guild_settings.id, [actor.id], actor.discord_ids)
+
     if guild_settings.id in [oronder_dnd_server_id]:
         logger.warning(f"Upserting {actor.name} to wiki!")
-        wikijs_task_queue.add_task(upload_to_wiki, actor)
+        await wikijs_task_queue.add_task(
+            upload_to_wiki, Actor.model_validate(actor.to_dict())
+        )
+
+
+@router.put("/actors")
+async def upsert_actors(request: Request, guild_settings=Depends(guild_auth)):
+    """Upsert a whole world's actors in one transaction. Invalid actors are reported, not fatal."""
+    try:
+        actors = msgspec.json.decode(await request.body(), type=List[msgspec.Raw])
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+
+    results = []
+    actor_models = {}
+    for actor_json in actors:
+        try:
+            actor = ActorStruct.decode(actor_json)
+        except (msgspec.ValidationError, msgspec.DecodeError) as e:
+            actor_dict = msgspec.json.decode(actor_json)
+            results.append(
+                {
+                    "id": str(
+                        actor_dict.get("id") if isinstance(actor_dict, dict) else None
+                    ),
+                    "status": "invalid",
+                    "errs": [str(e)],
+                }
+            )
+            continue
+        # a later copy of the same actor wins, ON CONFLICT can't touch a row twice
+        actor_models[actor.id] = actor
+
+    async with AsyncSession() as session:
+        written = await ActorTable.bulk_upsert(
+            session,
+            [
+                ActorTable.from_model(a, guild_settings.id)
+                for a in actor_models.values()
+            ],
+        )
+        await session.commit()
+    invalidate_actors(
+        guild_settings.id,
+        written,
+        {d for a in actor_models.values() if a.id in written for d in a.discord_ids},
+    )
+
+    for actor_id, actor in actor_models.items():
+        if actor_id not in written:
+            status_str = "unchanged"
+        elif written[actor_id]:
+            status_str = "inserted"
+        else:
+            status_str = "updated"
+        results.append({"id": actor_id, "status": status_str})
+
+    # queued once every status is known, so a wiki hiccup can't cost the caller its results
+    if guild_settings.id in [oronder_dnd_server_id]:
+        for actor_id in written:
+            actor = actor_models[actor_id]
+            logger.warning(f"Upserting {actor.name} to wiki!")
+            await wikijs_task_queue.add_task(
+                upload_to_wiki, Actor.model_validate(actor.to_dict())
+            )
+
+    return results
 
 
 @router.delete("/actor/{actor_id}")
@@ -143,10 +257,13 @@ async def delete_actor(
 
         if guild_settings.id in [oronder_dnd_server_id]:
             logger.warning(f"Deleting {actor.name} from wiki!")
-            wikijs_task_queue.add_task(delete_from_wiki, Actor.model_validate(actor))
+            await wikijs_task_queue.add_task(
+                delete_from_wiki, Actor.model_validate(actor)
+            )
 
         session.delete(actor)
         session.commit()
+        invalidate_actors(guild_settings.id, [actor_id], actor.discord_ids)
     except NoResultFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Actor {actor_id} not found"
@@ -200,10 +317,11 @@ async def init(
             detail="Oronder must be a member of Discord Server",
         )
 
-    guild_settings: GuildSettings | None = GuildSettingsTable.lookup(guild_id)
+    guild_settings: GuildSettings | None = await GuildSettingsTable.lookup(guild_id)
     auth_token = secrets.token_urlsafe()
 
     if guild_settings:
+        GuildSettingsTable.invalidate(guild_id, guild_settings.auth_token)
         guild_settings.auth_token = auth_token
     else:
         text_channels = guild.text_channels
@@ -11,6 +11,7 @@ from database.guild_settings_table import GuildSettingsTable
 from database.missions import MissionTable, edit_mission
 from system.items import format_number
 from system.rules import get_lvl
+from models.actor import Actor
 from models.guild_settings import GuildSettings
 from models.missions import Mission
 from routers.foundry_api import guild_auth
@@ -127,7 +128,7 @@ class SocketNamespace(socketio.AsyncNamespace):
         if not guild_id:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-        guild_settings = GuildSettingsTable.lookup(guild_id)
+        guild_settings = await GuildSettingsTable.lookup(guild_id)
         guild = self.bot.get_guild(guild_id)
         channel = guild.get_channel(guild_settings.combat_channel_id)
         if not channel:
@@ -189,7 +190,7 @@ class SocketNamespace(socketio.AsyncNamespace):
             if not xp:
                 return
 
-            guild_settings = GuildSettingsTable.lookup(guild_id)
+            guild_settings = await GuildSettingsTable.lookup(guild_id)
 
             with Session() as session:
                 stmt = select(MissionTable).filter_by(guild_id=guild_id, id=mission_id)
@@ -201,13 +202,18 @@ class SocketNamespace(socketio.AsyncNamespace):
 
             mission.xp = xp
             guild = self.bot.get_guild(guild_id)
+            actors = mission.get_actors()
+            actor_ids_to_xp_before = await Actor.get_exps(
+                guild_settings, [a.id for a in actors]
+            )
             actors_names_to_levels_before = {
-                a.name: get_lvl(a.get_exp(guild_settings)) for a in mission.get_actors()
+                a.name: get_lvl(actor_ids_to_xp_before[a.id]) for a in actors
             }
             await edit_mission(guild, mission)
-            name_id_xp = [
-                [a.name, a.id, a.get_exp(guild_settings)] for a in mission.get_actors()
-            ]
+            actor_ids_to_xp = await Actor.get_exps(
+                guild_settings, actor_ids_to_xp_before.keys()
+            )
+            name_id_xp = [[a.name, a.id, actor_ids_to_xp[a.id]] for a in actors]
             actor_names_to_levels = {name: get_lvl(xp) for [name, _, xp] in name_id_xp}
 
             out_str = "\n".join(
@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 import pprint
@@ -9,8 +10,11 @@ from pathlib import Path
 
 import httpx
 
-from utils import capitalize_title, getLogger, join_list, truncate
-from typing import Optional
+from utils import cache_dir, capitalize_title, getLogger, join_list, truncate
+from system.catalog import Catalog
+from system.snapshot import Snapshot
+from utils.SearchIndex import SearchIndex
+from typing import Optional, Callable, Any
 
 logger = getLogger(__name__)
 
@@ -81,6 +85,11 @@ class Stub:
 stub = Stub()
 
 
+data_snapshot = Snapshot(
+    cache_dir / "snapshot.msgpack", Path.cwd() / "data", Path(__file__).parent
+)
+
+
 def load_json(key):
     if not ENABLED:
         return stub
@@ -101,6 +110,16 @@ def load_json(key):
         return json.loads(response.content)
 
 
+def derive(name: str, sources: list[str], build: Callable[[], Any]):
+    """
+    Tables built from the json files in sources, served from data_snapshot while they are unchanged.
+    See system.snapshot.
+    """
+    if not ENABLED:
+        return build()
+    return data_snapshot.derive(name, sources, build)
+
+
 legal_sources = {
     "FTD",
     "TCE",
@@ -129,13 +148,33 @@ legal_classes = {
 
 illegal_ages = {"futuristic", "renaissance", "modern"}
 
-base_table = load_json("items-base")
 
-base_table["baseitem"] = [
-    i
-    for i in base_table["baseitem"]
-    if i["source"] in legal_sources and i.get("age") not in illegal_ages
-]
+def _build_base_table() -> dict:
+    table = load_json("items-base")
+    table["baseitem"] = [
+        i
+        for i in table["baseitem"]
+        if i["source"] in legal_sources and i.get("age") not in illegal_ages
+    ]
+    return table
+
+
+def _load_base() -> dict:
+    base_table = derive("base_table", ["items-base"], _build_base_table)
+    item_entries = {}
+    for i in base_table["itemEntry"]:
+        item_entries.setdefault(i["name"], i)
+    return {"base_table": base_table, "item_entries": item_entries}
+
+
+base_catalog = Catalog("base", _load_base)
+
+
+def __getattr__(name):
+    # only base_table, anything else falls through to submodule imports like `from system import items`
+    if name == "base_table":
+        return base_catalog.base_table
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def evaluate_and_replace_parentheses(expression: str):
@@ -190,31 +229,7 @@ def handle_description_entries(
     out = []
     for idx, e in enumerate(entries):
         if isinstance(e, str):
-            template_item_entry = re.sub(
-                pattern=r"\{#itemEntry ([^{}]+)}",
-                repl=lambda m: join_list(
-                    next(
-                        (i for i in base_table["itemEntry"] if i["name"] == m.group(1)),
-                        {},
-                    ).get("entriesTemplate", []),
-                    "\n",
-                ),
-                string=e,
-            )
-
-            template_double_curly = re.sub(
-                pattern=r"\{\{item.([^{}]+)}}",
-                repl=lambda m: join_list(entity.get(m.group(1)), " ", " and "),
-                string=template_item_entry,
-            )
-
-            template_equals = re.sub(
-                pattern=r"\{=([^{}]+)}",
-                repl=lambda m: entity.get(m.group(1), m.group(1)),
-                string=template_double_curly,
-            )
-
-            value = strip_template(template_equals)
+            value = strip_template(_expand_entry_templates(entity, e))
             if type == "list":
                 value = f"- {value}"
                 name = ""
@@ -249,31 +264,89 @@ def handle_description_entries(
     return out
 
 
+# {#itemEntry name}, {{item.key}} and {=key}, in one pass
+_entry_template = re.compile(r"\{#itemEntry ([^{}]+)}|\{\{item.([^{}]+)}}|\{=([^{}]+)}")
+
+
+def _expand_entry_templates(entity, entry: str) -> str:
+    if "{" not in entry:
+        return entry
+
+    def repl(m: re.Match) -> str:
+        item_entry, item_key, key = m.groups()
+        if item_entry is not None:
+            template = base_catalog.item_entries.get(item_entry, {})
+            # item entry templates are made of {{item.key}} and {=key} themselves
+            return _expand_entry_templates(
+                entity, join_list(template.get("entriesTemplate", []), "\n")
+            )
+        elif item_key is not None:
+            return join_list(entity.get(item_key), " ", " and ")
+        else:
+            return entity.get(key, key)
+
+    return _entry_template.sub(repl, entry)
+
+
+def _last(bar_split: list[str]) -> str:
+    return bar_split[-1]
+
+
+def _last_past(n: int) -> Callable[[list[str]], str]:
+    return lambda bar_split: bar_split[-1] if len(bar_split) > n else bar_split[0]
+
+
+# {@keyword content|...} -> text, anything not listed renders as the first | part
+_tag_renderers: dict[str, Callable[[list[str]], str]] = {
+    "quickref": _last_past(3),
+    "item": _last_past(2),
+    "condition": _last,
+    "sense": _last,
+    "status": _last,
+    "scaledamage": _last,
+    "scaledice": _last,
+    "table": _last,
+    "d20": lambda bar_split: "",
+}
+_template_token = re.compile(r"\{@|[{}]")
+
+
+def _render_tag(tag: str) -> str:
+    keyword, content = tag.split(None, 1)
+    bar_split = content.split("|")
+    render = _tag_renderers.get(keyword)
+    return render(bar_split) if render else bar_split[0]
+
+
+@functools.lru_cache(maxsize=16384)
 def strip_template(description):
-    pattern = r"{@([^{}]+)}"
-
-    def repl(match):
-        keyword, content = match.group(1).split(None, 1)
-        bar_split = content.split("|")
-        match keyword:
-            case "quickref":
-                return bar_split[-1] if len(bar_split) > 3 else bar_split[0]
-            case "item":
-                return bar_split[-1] if len(bar_split) > 2 else bar_split[0]
-            case (
-                "condition" | "sense" | "status" | "scaledamage" | "scaledice" | "table"
-            ):
-                return bar_split[-1]
-            case "d20":
-                return ""
-            case _:
-                return bar_split[0]
-
-    # Keep searching for "{@...}" occurrences until there are no more matches.
-    while re.search(pattern, description):
-        description = re.sub(pattern, repl, description, 1)
-
-    return description
+    """
+    Renders 5etools {@...} tags to plain text in a single left to right pass, innermost tags first.
+    Like the regex it replaced, a tag whose content holds a brace that isn't a tag is left as written.
+    """
+    if "{@" not in description:
+        return description
+
+    out = []
+    # indexes in out of the "{@" of every tag still open
+    open_tags = []
+    pos = 0
+    for m in _template_token.finditer(description):
+        out.append(description[pos : m.start()])
+        pos = m.end()
+        token = m.group()
+        if token == "{@":
+            open_tags.append(len(out))
+            out.append(token)
+        elif token == "}" and open_tags and (tag := "".join(out[open_tags[-1] + 1 :])):
+            del out[open_tags.pop() :]
+            out.append(_render_tag(tag))
+        else:
+            # a stray brace, no tag opened before it can close after it
+            open_tags.clear()
+            out.append(token)
+    out.append(description[pos:])
+    return "".join(out)
 
 
 ITEM_TYPE_JSON_TO_ABV = {
@@ -362,6 +435,7 @@ SKILLS = {
     "ste": "Stealth",
     "sur": "Survival",
 }
+skill_index = SearchIndex(SKILLS.values())
 TOOLS = {
     "art": "Artisan's Tools",
     "alchemist": "Alchemist's Supplies",
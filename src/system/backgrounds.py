@@ -3,23 +3,49 @@ import re
 from discord import Embed
 
 import system
+from system.embed_cache import lookup_embeds
 from utils import capitalize_title, join_list
+from utils.SearchIndex import SearchIndex
 
-backgrounds = {
-    bg["name"]: bg
-    for bg in system.load_json("backgrounds")["background"]
-    if bg["source"] in system.legal_sources
-}
+def _load() -> dict:
+    backgrounds = system.derive(
+        "backgrounds",
+        ["backgrounds"],
+        lambda: {
+            bg["name"]: bg
+            for bg in system.load_json("backgrounds")["background"]
+            if bg["source"] in system.legal_sources
+        },
+    )
+    return {"backgrounds": backgrounds, "background_index": SearchIndex(backgrounds)}
+
+
+catalog = system.Catalog("backgrounds", _load)
+
+
+def __getattr__(name):
+    return getattr(catalog, name)
 
 
 def get(background, key):
     return background.get(
-        key, backgrounds.get(background.get("_copy", {}).get("name"), {}).get(key, None)
+        key,
+        catalog.backgrounds.get(background.get("_copy", {}).get("name"), {}).get(
+            key, None
+        ),
     )
 
 
 def generate_background_embed(background_name):
-    background = backgrounds[background_name]
+    embed = lookup_embeds.get("background", background_name)
+    if embed is None:
+        embed = _render_background_embed(background_name)
+        lookup_embeds.set("background", background_name, embed)
+    return embed
+
+
+def _render_background_embed(background_name):
+    background = catalog.backgrounds[background_name]
     embed = Embed(title=background_name)
     skills = get(background, "skillProficiencies")
     if skills:
@@ -98,3 +124,6 @@ def generate_background_embed(background_name):
     embed.set_footer(text=f"Background | {background['source']}{page}")
 
     return embed
+
+
+lookup_embeds.register("background", _render_background_embed)
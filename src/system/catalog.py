@@ -0,0 +1,103 @@
+import importlib
+import threading
+import time
+from typing import Callable, Dict
+
+from utils import getLogger
+
+logger = getLogger(__name__)
+
+# every system submodule holding a Catalog, for warm_up
+catalog_modules = ["backgrounds", "feats", "items", "rules", "spells"]
+
+_imported_at = time.perf_counter()
+_loading = threading.local()
+
+
+class Catalog:
+    """
+    Tables a system module builds from the 5etools json, loaded the first time one of them is read rather than on
+    import, so the bot can connect before any json is parsed. Attribute access returns the table of that name.
+    Autocompletes read these from worker threads, so the load runs once under a lock.
+    """
+
+    registry: Dict[str, "Catalog"] = {}
+
+    def __init__(self, name: str, load: Callable[[], dict]):
+        self.name = name
+        self._load = load
+        self._lock = threading.Lock()
+        self._tables: dict | None = None
+        self.load_seconds: float | None = None
+        self.own_seconds: float | None = None
+        self.loaded_after: float | None = None
+        self.loaded_by: str | None = None
+        Catalog.registry[name] = self
+
+    def loaded(self) -> bool:
+        return self._tables is not None
+
+    def tables(self) -> dict:
+        if self._tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = self._timed_load()
+                    logger.info(f"Loaded {self.name} catalog in {self.own_seconds:.3f}s")
+        return self._tables
+
+    def _timed_load(self) -> dict:
+        # catalogs loading other catalogs, e.g. items needs spells, only count their own time in own_seconds
+        outer = getattr(_loading, "nested", 0.0)
+        _loading.nested = 0.0
+        start = time.perf_counter()
+        try:
+            return self._load()
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self.own_seconds = self.load_seconds - _loading.nested
+            self.loaded_after = time.perf_counter() - _imported_at
+            self.loaded_by = threading.current_thread().name
+            _loading.nested = outer + self.load_seconds
+
+    def __getattr__(self, item):
+        if item.startswith("__"):
+            # copy, pickle and friends probing for protocol methods shouldn't load anything
+            raise AttributeError(item)
+        try:
+            return self.tables()[item]
+        except KeyError:
+            raise AttributeError(
+                f"{self.name} catalog has no table {item!r}"
+            ) from None
+
+    def to_dict(self) -> dict:
+        return {
+            "loaded": self.loaded(),
+            "own_seconds": round(self.own_seconds, 3) if self.loaded() else None,
+            "load_seconds": round(self.load_seconds, 3) if self.loaded() else None,
+            "loaded_after_seconds": round(self.loaded_after, 3)
+            if self.loaded()
+            else None,
+            "loaded_by": self.loaded_by,
+        }
+
+
+def catalog_report() -> dict:
+    return {name: c.to_dict() for name, c in Catalog.registry.items()}
+
+
+def warm_up():
+    """Load every catalog now instead of on first use. Blocking, run it in a thread."""
+    start = time.perf_counter()
+    for module in catalog_modules:
+        importlib.import_module(f"system.{module}")
+    for c in list(Catalog.registry.values()):
+        c.tables()
+
+    report = "\n".join(
+        f"  {name:<12} {c.own_seconds:7.3f}s  ({c.loaded_by})"
+        for name, c in Catalog.registry.items()
+    )
+    logger.critical(
+        f"System catalogs warmed in {time.perf_counter() - start:.3f}s\n{report}"
+    )
@@ -0,0 +1,160 @@
+"""
+Rendered /lookup embeds, so looking up the same item, spell, feat, background or rule twice doesn't rebuild its
+Embed from the json. Entries are keyed by (kind, name, data version), the version being Snapshot.version(), so an
+embed rendered from older json or code is never served.
+
+Embeds are kept as Embed.to_dict() payloads and written to cache/ on shutdown, together with how often each was
+looked up, so the next start serves them straight away and can prebuild the most popular ones in the background.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import msgspec
+from discord import Embed
+
+import system
+from utils import cache_dir, getLogger
+from utils.TtlLruCache import TtlLruCache
+
+logger = getLogger(__name__)
+
+# bump when the file layout below changes
+EMBED_CACHE_FORMAT = 1
+
+# item embeds include 5emagic.shop prices, so even unchanged json gets rerendered now and then
+lookup_embed_cache = TtlLruCache("lookup_embeds", maxsize=2048, ttl=6 * 60 * 60)
+
+
+class _Entry(msgspec.Struct, array_like=True):
+    kind: str
+    name: str
+    # wall clock, monotonic time doesn't survive a restart
+    expires_at: float
+    payload: dict
+
+
+class _EmbedCacheFile(msgspec.Struct):
+    format: int
+    version: str
+    entries: List[_Entry]
+    popularity: List[Tuple[str, str, int]]
+
+
+class EmbedCache:
+    def __init__(self, cache: TtlLruCache, path: Path | None, prebuild_count: int):
+        self.cache = cache
+        self.path = path
+        self.prebuild_count = prebuild_count
+        # kind -> render(name), sync or async, used to prebuild
+        self.renderers: Dict[str, Callable[[str], Any]] = {}
+        self.popularity: Counter[tuple[str, str]] = Counter()
+        self._restored = False
+
+    def register(self, kind: str, render: Callable[[str], Any]):
+        self.renderers[kind] = render
+
+    def get(self, kind: str, name: str) -> Embed | None:
+        self._restore()
+        payload = self.cache.get((kind, name, system.data_snapshot.version()))
+        if payload is TtlLruCache.MISS:
+            return None
+        self.popularity[(kind, name)] += 1
+        return Embed.from_dict(payload)
+
+    def set(self, kind: str, name: str, embed: Embed):
+        """Cache a freshly rendered embed. Only call it for names that rendered, typos would crowd out real entries."""
+        self.popularity[(kind, name)] += 1
+        self._store(kind, name, embed)
+
+    def _store(self, kind: str, name: str, embed: Embed):
+        self.cache.set((kind, name, system.data_snapshot.version()), embed.to_dict())
+
+    def _restore(self):
+        if self._restored or self.path is None:
+            return
+        self._restored = True
+        try:
+            saved = msgspec.msgpack.decode(
+                self.path.read_bytes(), type=_EmbedCacheFile
+            )
+        except FileNotFoundError:
+            return
+        except (msgspec.DecodeError, msgspec.ValidationError) as e:
+            logger.warning(f"Ignoring unreadable {self.path.name}: {e}")
+            return
+        if saved.format != EMBED_CACHE_FORMAT:
+            return
+
+        version = system.data_snapshot.version()
+        now = time.time()
+        for kind, name, count in saved.popularity:
+            self.popularity[(kind, name)] += count
+        if saved.version != version:
+            logger.info(f"Data changed since {self.path.name} was saved.")
+            return
+        for e in saved.entries:
+            if e.expires_at > now:
+                self.cache.set(
+                    (e.kind, e.name, version), e.payload, ttl=e.expires_at - now
+                )
+        logger.info(f"Restored {len(self.cache.entries())} lookup embeds")
+
+    async def prebuild(self):
+        """Render the most looked up embeds that aren't cached yet, sync renderers in a thread. Run after warm_up."""
+        self._restore()
+        version = system.data_snapshot.version()
+        start = time.perf_counter()
+        built = 0
+        for (kind, name), _ in self.popularity.most_common(self.prebuild_count):
+            render = self.renderers.get(kind)
+            if render is None or (kind, name, version) in self.cache:
+                continue
+            try:
+                if asyncio.iscoroutinefunction(render):
+                    embed = await render(name)
+                else:
+                    embed = await asyncio.to_thread(render, name)
+            except Exception as e:
+                logger.warning(f"Could not prebuild {kind} {name}: {e}")
+                continue
+            if embed is not None:
+                self._store(kind, name, embed)
+                built += 1
+        logger.info(
+            f"Prebuilt {built} lookup embeds in {time.perf_counter() - start:.3f}s"
+        )
+
+    def save(self):
+        if self.path is None or not system.ENABLED:
+            return
+        version = system.data_snapshot.version()
+        now = time.time()
+        entries = [
+            _Entry(kind, name, now + seconds_left, payload)
+            for (kind, name, v), payload, seconds_left in self.cache.entries()
+            if v == version
+        ]
+        popularity = [(k, n, c) for (k, n), c in self.popularity.items()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_bytes(
+            msgspec.msgpack.encode(
+                _EmbedCacheFile(EMBED_CACHE_FORMAT, version, entries, popularity)
+            )
+        )
+        os.replace(tmp, self.path)
+        logger.info(f"Saved {len(entries)} lookup embeds to {self.path}")
+
+
+lookup_embeds = EmbedCache(
+    lookup_embed_cache,
+    cache_dir / "embeds.msgpack"
+    if os.getenv("LOOKUP_EMBED_PERSIST", "true").lower() == "true"
+    else None,
+    int(os.getenv("LOOKUP_EMBED_PREBUILD", 200)),
+)
@@ -1,15 +1,42 @@
 from discord import Embed
 
 import system
+from system.embed_cache import lookup_embeds
 from utils import getLogger, capitalize_title, join_list
+from utils.SearchIndex import SearchIndex
 
 logger = getLogger(__name__)
 
-feats = {feat['name']: feat for feat in system.load_json('feats')['feat'] if feat['source'] in system.legal_sources}
+def _load() -> dict:
+    feats = system.derive(
+        "feats",
+        ["feats"],
+        lambda: {
+            feat["name"]: feat
+            for feat in system.load_json("feats")["feat"]
+            if feat["source"] in system.legal_sources
+        },
+    )
+    return {"feats": feats, "feat_index": SearchIndex(feats)}
+
+
+catalog = system.Catalog("feats", _load)
+
+
+def __getattr__(name):
+    return getattr(catalog, name)
 
 
 def generate_feat_embed(feat_name):
-    feat = feats[feat_name]
+    embed = lookup_embeds.get("feat", feat_name)
+    if embed is None:
+        embed = _render_feat_embed(feat_name)
+        lookup_embeds.set("feat", feat_name, embed)
+    return embed
+
+
+def _render_feat_embed(feat_name):
+    feat = catalog.feats[feat_name]
     embed = Embed(title=feat_name)
 
     ability_strs = []
@@ -33,7 +60,7 @@ def generate_feat_embed(feat_name):
                     f"Increase your {join_list(stats, ', ', ' or ')} score by 1, to a maximum of 20."
                 )
 
-    [j.get('entry', j.get('choose', j)) for i in feats.values() if 'ability' in i for j in i['ability']]
+    [j.get('entry', j.get('choose', j)) for i in catalog.feats.values() if 'ability' in i for j in i['ability']]
 
     if 'prerequisite' in feat:
         prereq_strs = []
@@ -70,3 +97,6 @@ def generate_feat_embed(feat_name):
         embed.add_field(name=n, value=v, inline=i)
     embed.set_footer(text=f"Feat | {feat['source']}  {feat['page']}")
     return embed
+
+
+lookup_embeds.register("feat", _render_feat_embed)
@@ -1,15 +1,18 @@
-import html
 import random
 import re
+from itertools import chain
 from typing import Callable
 
 import d20
-import httpx
 from discord import Embed
 
+from integrations import magic_shop
 import system
-from system.spells import spells_by_level, spells_by_name, spell_names, st_nd_rd_th
+from system import spells
+from system.embed_cache import lookup_embeds
+from system.spells import st_nd_rd_th
 from utils import capitalize_title, getLogger, join_list
+from utils.SearchIndex import SearchIndex
 
 logger = getLogger(__name__)
 
@@ -27,10 +30,6 @@ attack_modes_reversed = {v: k for k, v in attack_modes.items()}
 attack_modes_human: list[str] = list(attack_modes.keys())
 attack_modes_machine: list[str] = list(attack_modes.values())
 
-loot_table, variant_table, item_table = [
-    system.load_json(f) for f in ["loot", "magicvariants", "items"]
-]
-
 
 def get_item_name(generic: dict, variant: dict) -> str:
     prefix = variant.get("inherits", {}).get("namePrefix")
@@ -38,48 +37,213 @@ def get_item_name(generic: dict, variant: dict) -> str:
     return join_list([prefix, generic["name"], suffix], "")
 
 
-generics = [
-    g
-    for g in system.base_table["baseitem"]
-    if g["source"] in system.legal_sources and g.get("age") not in system.illegal_ages
-]
+def base_item_key(base_item: dict) -> tuple[str, str]:
+    return base_item["name"], base_item["source"]
+
+
+def variant_key(variant: dict) -> tuple[str, str]:
+    return variant["name"], variant["inherits"]["source"]
+
+
+def _requires_met(base_item: dict, variant: dict) -> bool:
+    return any(
+        all(base_item.get(k) == v for (k, v) in require.items())
+        for require in variant.get("requires", [])
+    )
+
+
+def _excludes_met(base_item: dict, variant: dict) -> bool:
+    return all(
+        base_item.get(k) != v for (k, v) in variant.get("excludes", {}).items()
+    )
+
+
+def _index_by_name(entries, key=str.lower) -> dict[str, dict]:
+    """First entry wins, like the next() scans these replaced."""
+    out = {}
+    for e in entries:
+        out.setdefault(key(e["name"]), e)
+    return out
+
+
+def _positional_index(entries, key) -> dict[str, list[tuple[int, dict]]]:
+    """key -> [(position in entries, entry)], so hits from several keys can be merged back into table order."""
+    out = {}
+    for position, e in enumerate(entries):
+        k = key(e)
+        if k is not None:
+            out.setdefault(k, []).append((position, e))
+    return out
+
+
+def _build_tables(generics: list[dict]) -> dict:
+    loot, variants, items = [
+        system.load_json(f) for f in ["loot", "magicvariants", "items"]
+    ]
 
-variants_dict = {
-    get_item_name(g, v): {
-        "generic": g["name"],
-        "variant": v["name"],
-        "rarity": v["inherits"]["rarity"],
+    # positions in generics meeting each variant's requires / excludes, the whole cross product worked out once
+    requires = [
+        [n for n, g in enumerate(generics) if _requires_met(g, v)]
+        for v in variants["magicvariant"]
+    ]
+    excludes = [
+        [n for n, g in enumerate(generics) if _excludes_met(g, v)]
+        for v in variants["magicvariant"]
+    ]
+    eligible = [set(r).intersection(e) for r, e in zip(requires, excludes)]
+
+    variants_dict = {
+        get_item_name(g, v): {
+            "generic": g["name"],
+            "variant": v["name"],
+            "rarity": v["inherits"]["rarity"],
+        }
+        for n, g in enumerate(generics)
+        for v, e in zip(variants["magicvariant"], eligible)
+        if v["inherits"]["source"] in system.legal_sources and n in e
     }
-    for g in generics
-    for v in variant_table["magicvariant"]
-    if v["inherits"]["source"] in system.legal_sources
-    and any(
-        all(g.get(k) == v for (k, v) in requirement.items())
-        for requirement in v["requires"]
+
+    magic_items = [
+        (i["name"], i.get("rarity", "unknown"))
+        for i in items["item"]
+        if i["source"] in system.legal_sources
+        and "$" not in i.get("type", [])
+        and i.get("age") not in system.illegal_ages
+        and i["name"] not in variants_dict.keys()
+    ]
+
+    return {
+        "loot_table": loot,
+        "variant_table": variants,
+        "item_table": items,
+        "requires": requires,
+        "excludes": excludes,
+        "variants_dict": variants_dict,
+        "items_to_rarity": dict(
+            magic_items
+            + [(g["name"], "none") for g in generics]
+            + [(k, v["rarity"]) for k, v in variants_dict.items()]
+        ),
+    }
+
+
+def _load() -> dict:
+    base_items = system.base_table["baseitem"]
+    generics = [
+        g
+        for g in base_items
+        if g["source"] in system.legal_sources
+        and g.get("age") not in system.illegal_ages
+    ]
+    tables = system.derive(
+        "items",
+        ["items-base", "loot", "magicvariants", "items"],
+        lambda: _build_tables(generics),
     )
-    and ("excludes" not in v or all(g.get(k) != v for (k, v) in v["excludes"].items()))
-}
+    variant_table, item_table = tables["variant_table"], tables["item_table"]
+
+    # Which base items each variant can apply to, keyed by (name, source).
+    # requires and excludes are kept apart because variant_lookup / base_item_lookup test them separately.
+    bases_meeting_requires: dict[tuple, set[tuple]] = {}
+    bases_meeting_excludes: dict[tuple, set[tuple]] = {}
+    variants_requires_met: dict[tuple, set[tuple]] = {}
+    variants_excludes_met: dict[tuple, set[tuple]] = {}
+    variant_base_items: dict[tuple, list[dict]] = {}
+    base_item_variants: dict[tuple, list[dict]] = {}
+    for v, requires, excludes in zip(
+        variant_table["magicvariant"], tables["requires"], tables["excludes"]
+    ):
+        for n in requires:
+            bases_meeting_requires.setdefault(variant_key(v), set()).add(
+                base_item_key(generics[n])
+            )
+            variants_requires_met.setdefault(base_item_key(generics[n]), set()).add(
+                variant_key(v)
+            )
+        for n in excludes:
+            bases_meeting_excludes.setdefault(variant_key(v), set()).add(
+                base_item_key(generics[n])
+            )
+            variants_excludes_met.setdefault(base_item_key(generics[n]), set()).add(
+                variant_key(v)
+            )
+        for n in sorted(set(requires).intersection(excludes)):
+            variant_base_items.setdefault(variant_key(v), []).append(generics[n])
+            base_item_variants.setdefault(base_item_key(generics[n]), []).append(v)
 
-magic_items = [
-    (i["name"], i.get("rarity", "unknown"))
-    for i in item_table["item"]
-    if i["source"] in system.legal_sources
-    and "$" not in i.get("type", [])
-    and i.get("age") not in system.illegal_ages
-    and i["name"] not in variants_dict.keys()
-]
+    magic_item_tables = {}
+    for t in tables["loot_table"]["magicItems"]:
+        magic_item_tables.setdefault(t["type"], t["table"])
 
-items_to_rarity = dict(
-    magic_items
-    + [(g["name"], "none") for g in generics]
-    + [(k, v["rarity"]) for k, v in variants_dict.items()]
-)
+    prices_by_name = {}
+    for i in chain(base_items, item_table["item"]):
+        if "value" in i:
+            prices_by_name.setdefault(i["name"], i["value"])
+
+    base_items_by_lower_name = _positional_index(
+        base_items, lambda i: i["name"].lower()
+    )
+
+    items_to_rarity = tables["items_to_rarity"]
+    shoppable_items = [
+        k
+        for (k, v) in items_to_rarity.items()
+        if v in ["common", "uncommon", "rare", "very rare", "legendary"]
+    ] + [f"{SCROLL_OF} {spell}" for spell in spells.spell_names]
+
+    return {
+        "loot_table": tables["loot_table"],
+        "variant_table": variant_table,
+        "item_table": item_table,
+        "generics": generics,
+        "variants_dict": tables["variants_dict"],
+        "items_to_rarity": items_to_rarity,
+        "all_items": items_to_rarity.keys(),
+        "shoppable_items": shoppable_items,
+        "shoppable_item_index": SearchIndex(shoppable_items),
+        "bases_meeting_requires": bases_meeting_requires,
+        "bases_meeting_excludes": bases_meeting_excludes,
+        "variants_requires_met": variants_requires_met,
+        "variants_excludes_met": variants_excludes_met,
+        "variant_base_items": variant_base_items,
+        "base_item_variants": base_item_variants,
+        # name lookups, instead of scanning the tables on every get_item / loot roll
+        "items_by_name": _index_by_name(item_table["item"]),
+        "base_items_by_name": _index_by_name(base_items),
+        "variants_by_name": _index_by_name(variant_table["magicvariant"]),
+        "item_groups_by_name": _index_by_name(item_table["itemGroup"], key=str),
+        # loot rolls pick from these in table order, not in the order the roll lists names
+        "variant_positions_by_name": _positional_index(
+            variant_table["magicvariant"], lambda v: v["name"]
+        ),
+        "item_group_positions_by_name": _positional_index(
+            item_table["itemGroup"], lambda g: g["name"]
+        ),
+        "magic_item_tables": magic_item_tables,
+        "prices_by_name": prices_by_name,
+        # variant resolution in get_item, see _variant_candidates and _base_item_candidates
+        "base_items_by_lower_name": base_items_by_lower_name,
+        "base_item_name_lengths": sorted({len(k) for k in base_items_by_lower_name}),
+        "variants_by_prefix": _positional_index(
+            variant_table["magicvariant"], lambda v: v["inherits"].get("namePrefix")
+        ),
+        "variants_by_suffix": _positional_index(
+            variant_table["magicvariant"], lambda v: v["inherits"].get("nameSuffix")
+        ),
+    }
+
+
+catalog = system.Catalog("items", _load)
+
+
+def __getattr__(name):
+    return getattr(catalog, name)
 
 
 def get_item_rarity(item_name):
     if item_name.startswith(SCROLL_OF):
         spell_name = item_name.split(f"{SCROLL_OF} ")[1]
-        spell = spells_by_name.get(spell_name)
+        spell = spells.spells_by_name.get(spell_name)
         if spell:
             match spell["level"]:
                 case 0 | 1:
@@ -93,16 +257,9 @@ def get_item_rarity(item_name):
                 case 9:
                     return "legendary"
 
-    return items_to_rarity.get(item_name)
+    return catalog.items_to_rarity.get(item_name)
 
 
-all_items = items_to_rarity.keys()
-shoppable_items = [
-    k
-    for (k, v) in items_to_rarity.items()
-    if v in ["common", "uncommon", "rare", "very rare", "legendary"]
-] + [f"{SCROLL_OF} {spell}" for spell in spell_names]
-
 dmg_prices = {
     "common": "50-100",
     "uncommon": "101-500",
@@ -141,14 +298,7 @@ def copper_value_to_human_readable(coppers: int):
 
 
 def get_official_price(item_name, is_consumable=False):
-    base_price = next(
-        (
-            i["value"]
-            for i in system.base_table["baseitem"] + item_table["item"]
-            if i["name"] == item_name and "value" in i
-        ),
-        None,
-    )
+    base_price = catalog.prices_by_name.get(item_name)
 
     if base_price:
         return copper_value_to_human_readable(base_price)
@@ -156,7 +306,7 @@ def get_official_price(item_name, is_consumable=False):
         base_cost = 0
         if item_name.startswith(SCROLL_OF):
             spell_name = item_name.split(f"{SCROLL_OF} ")[1]
-            spell = spells_by_name.get(spell_name)
+            spell = spells.spells_by_name.get(spell_name)
             if spell:
                 is_consumable = True
                 material_component = spell.get("components", []).get("m", [])
@@ -166,16 +316,9 @@ def get_official_price(item_name, is_consumable=False):
                 ):
                     base_cost = int(material_component["cost"] / 100)
         else:
-            variant = variants_dict.get(item_name)
+            variant = catalog.variants_dict.get(item_name)
             if variant:
-                base_cost = int(
-                    next(
-                        i["value"]
-                        for i in system.base_table["baseitem"]
-                        if i["name"] == variant["generic"]
-                    )
-                    / 100
-                )
+                base_cost = int(catalog.prices_by_name.get(variant["generic"], 0) / 100)
             if not is_consumable:
                 is_consumable = any(
                     consumable in item_name.casefold()
@@ -226,37 +369,31 @@ def format_number(n: str | int | None, denomination="gp", half=False, base_cost=
     return f"{out}{plus} {denomination}"
 
 
-def get_item_prices(item_name: str, is_consumable=False):
+async def get_item_prices(item_name: str, is_consumable=False):
     spreadsheet_price = (
         f"**{format_number(spreadsheet_items[item_name])}**"
         if item_name in spreadsheet_items
         else None
     )
 
-    five_e_price = five_e_magic_shop_lookup(item_name)
+    five_e_price = await magic_shop.item_prices(item_name)
     five_e_price = (
-        format_number(five_e_price[0]["price"]) if len(five_e_price) == 1 else None
+        format_number(five_e_price[0])
+        if five_e_price and len(five_e_price) == 1
+        else None
     )
 
     return spreadsheet_price, five_e_price, get_official_price(item_name, is_consumable)
 
 
-def get_item_price_string(item_name: str, consumbable=False):
-    spreadsheet_price, five_e_price, dmg_price = get_item_prices(item_name, consumbable)
+async def get_item_price_string(item_name: str, consumbable=False):
+    spreadsheet_price, five_e_price, dmg_price = await get_item_prices(
+        item_name, consumbable
+    )
 
     return f"{spreadsheet_price} / {five_e_price} / {dmg_price}"
 
 
-def five_e_magic_shop_lookup(item_name: str):
-    url = f"https://5emagic.shop/api/item-lookup?search={html.escape(item_name)}"
-    response = httpx.get(url)
-    if response.is_success:
-        return response.json()
-    else:
-        logger.error(f"{response.status_code} {response.reason_phrase} {response.url}")
-        return [{"price": None}]
-
-
 def process_roll_table_item(i: dict) -> str:
     """
 
@@ -267,44 +404,35 @@ def process_roll_table_item(i: dict) -> str:
 
     if "choose" in i:
         if "fromGeneric" in i["choose"]:
-            variant = next(
+            names = set(i["choose"]["fromGeneric"])
+            variant = min(
                 (
-                    v
-                    for v in variant_table["magicvariant"]
-                    if v["name"] in i["choose"]["fromGeneric"]
+                    hit
+                    for name in names
+                    for hit in catalog.variant_positions_by_name.get(name, [])
                 ),
-                None,
-            )
+                key=lambda hit: hit[0],
+                default=(None, None),
+            )[1]
 
             if variant:
-                results = [
-                    base_item
-                    for base_item in system.base_table["baseitem"]
-                    if all(
-                        base_item.get(k) != v
-                        for (k, v) in variant.get("excludes", {}).items()
-                    )
-                    and any(
-                        all(base_item.get(k) == v for (k, v) in require.items())
-                        for require in variant.get("requires", [])
-                    )
-                ]
+                results = catalog.variant_base_items.get(variant_key(variant), [])
                 item_name = get_item_name(random.choice(results), variant)
             else:
+                groups = sorted(
+                    (
+                        hit
+                        for name in names
+                        for hit in catalog.item_group_positions_by_name.get(name, [])
+                    ),
+                    key=lambda hit: hit[0],
+                )
                 item_name = random.choice(
-                    [
-                        item
-                        for group in item_table["itemGroup"]
-                        if group["name"] in i["choose"]["fromGeneric"]
-                        for item in group["items"]
-                    ]
+                    [item for _, group in groups for item in group["items"]]
                 )
         elif "fromGroup" in i["choose"]:
             group_name = i["choose"]["fromGroup"][0]
-            group_items = next(
-                g for g in item_table["itemGroup"] if g["name"] == group_name
-            )["items"]
-            item_name = random.choice(group_items)
+            item_name = random.choice(catalog.item_groups_by_name[group_name]["items"])
         elif "fromItems" in i["choose"]:
             item_name = random.choice(i["choose"]["fromItems"])
         else:
@@ -320,7 +448,7 @@ def process_roll_table_item(i: dict) -> str:
         if "Spell Scroll" in item_name:
             lvl = item_name[item_name.index("(") + 1]
             lvl = 0 if lvl == "C" else int(lvl)
-            item_name = f"{SCROLL_OF} {random.choice(spells_by_level[lvl])}"
+            item_name = f"{SCROLL_OF} {random.choice(spells.spells_by_level[lvl])}"
     else:
         logger.error(f"{i=}")
 
@@ -328,20 +456,16 @@ def process_roll_table_item(i: dict) -> str:
 
 
 def variant_lookup(variants, potential_base_items, condition):
+    base_keys = {base_item_key(base_item) for base_item in potential_base_items}
     return [
         variant
         for variant in variants
         if condition(variant)
-        and any(
-            any(
-                all(base_item.get(k) == v for (k, v) in require.items())
-                for require in variant.get("requires", [])
-            )
-            for base_item in potential_base_items
+        and not base_keys.isdisjoint(
+            catalog.bases_meeting_requires.get(variant_key(variant), ())
         )
-        and any(
-            all(base_item.get(k) != v for (k, v) in variant.get("excludes", {}).items())
-            for base_item in potential_base_items
+        and not base_keys.isdisjoint(
+            catalog.bases_meeting_excludes.get(variant_key(variant), ())
         )
     ]
 
@@ -349,60 +473,61 @@ def variant_lookup(variants, potential_base_items, condition):
 def base_item_lookup(
     base_items, potential_prefixes, potential_suffixes, condition: Callable
 ):
+    affix_keys = [
+        {variant_key(variant) for variant in variants}
+        for variants in [potential_prefixes, potential_suffixes]
+        if variants
+    ]
     return [
         base_item
         for base_item in base_items
         if condition(base_item)
         and all(  # satisfy at least one prefix, and one suffix. Does that make sense?
-            any(  # satisfy at least one variant (ie, suffix or prefix depending on iteration)
-                any(  # satisfy one of the sets of requires
-                    all(
-                        base_item.get(k) == v for (k, v) in require.items()
-                    )  # within that requirement, satisfy all
-                    for require in variant.get("requires", [])
-                )
-                for variant in variants
+            # satisfy the requires of at least one variant (ie, suffix or prefix depending on iteration)
+            not keys.isdisjoint(
+                catalog.variants_requires_met.get(base_item_key(base_item), ())
             )
-            and any(  # satisfy at least one prefix's excludes if there is one
-                all(
-                    base_item.get(k) != v
-                    for (k, v) in variant.get("excludes", {}).items()
-                )
-                for variant in variants
+            # and the excludes of at least one
+            and not keys.isdisjoint(
+                catalog.variants_excludes_met.get(base_item_key(base_item), ())
             )
-            for variants in [potential_prefixes, potential_suffixes]
-            if variants
+            for keys in affix_keys
         )
     ]
 
 
+def _base_item_candidates(item_name: str) -> list[dict]:
+    """Base items whose name appears anywhere in item_name, in table order."""
+    lowered = item_name.lower()
+    hits = []
+    for length in catalog.base_item_name_lengths:
+        if length > len(lowered):
+            break
+        for start in range(len(lowered) - length + 1):
+            hits.extend(catalog.base_items_by_lower_name.get(lowered[start : start + length], ()))
+    # a name can appear more than once, e.g. "Arrow" in "Arrow-Catching Arrow"
+    return [i for _, i in sorted(dict(hits).items())]
+
+
+def _variant_candidates(item_name: str, index: dict, affix) -> list[dict]:
+    """Variants whose namePrefix / nameSuffix matches item_name, in table order."""
+    hits = []
+    for end in range(len(item_name) + 1):
+        hits.extend(index.get(affix(item_name, end), ()))
+    return [v for _, v in sorted(hits, key=lambda h: h[0])]
+
+
 def get_item(item_name: str):
+    lowered = item_name.lower()
     item = (
-        next(
-            (i for i in item_table["item"] if i["name"].lower() == item_name.lower()),
-            None,
-        )
-        or next(
-            (
-                i
-                for i in system.base_table["baseitem"]
-                if i["name"].lower() == item_name.lower()
-            ),
-            None,
-        )
-        or next(
-            (
-                i
-                for i in variant_table["magicvariant"]
-                if i["name"].lower() == item_name.lower()
-            ),
-            None,
-        )
+        catalog.items_by_name.get(lowered)
+        or catalog.base_items_by_name.get(lowered)
+        or catalog.variants_by_name.get(lowered)
     )
 
     if not item and item_name.startswith(SCROLL_OF):
         spell_name = item_name.split(f"{SCROLL_OF} ")[1]
-        spell = spells_by_name.get(spell_name)
+        spell = spells.spells_by_name.get(spell_name)
         if spell:
             item = {
                 **spell,
@@ -410,19 +535,15 @@ def get_item(item_name: str):
                 "type_string": f"Spell Scroll ({st_nd_rd_th(spell['level'])} Level)",
             }
     elif not item:
-        base_items = [
-            i
-            for i in system.base_table["baseitem"]
-            if i["name"].lower() in item_name.lower()
-        ]
+        base_items = _base_item_candidates(item_name)
         prefs = variant_lookup(
-            variant_table["magicvariant"],
+            _variant_candidates(item_name, catalog.variants_by_prefix, lambda n, i: n[:i]),
             base_items,
             lambda v: "namePrefix" in v["inherits"]
             and item_name.startswith(v["inherits"]["namePrefix"]),
         )
         suffs = variant_lookup(
-            variant_table["magicvariant"],
+            _variant_candidates(item_name, catalog.variants_by_suffix, lambda n, i: n[i:]),
             base_items,
             lambda v: "nameSuffix" in v["inherits"]
             and item_name.endswith(v["inherits"]["nameSuffix"]),
@@ -582,7 +703,18 @@ def get_item(item_name: str):
     return item, None
 
 
-def generate_item_embed(item_name):
+async def generate_item_embed(item_name):
+    embed = lookup_embeds.get("item", item_name)
+    if embed is not None:
+        return embed, None
+    embed, error = await _render_item_embed(item_name)
+    # an embed missing its shop price because the shop was down would be served for hours
+    if embed is not None and magic_shop.answered(item_name):
+        lookup_embeds.set("item", item_name, embed)
+    return embed, error
+
+
+async def _render_item_embed(item_name):
     embed = Embed(title=item_name)
     item, error = get_item(item_name)
     if error:
@@ -612,11 +744,10 @@ def generate_item_embed(item_name):
         )
         embed.add_field(name="", value=f"AC {item['ac']}{dex_bonus}")
 
+    prices = await get_item_prices(item_name, item["consumable"])
     price_and_weight = join_list(
         [
-            next(
-                (p for p in get_item_prices(item_name, item["consumable"]) if p), None
-            ),
+            next((p for p in prices if p), None),
             "1 lb."
             if item.get("weight") == 1
             else f"{item['weight']} lbs."
@@ -674,6 +805,14 @@ def generate_item_embed(item_name):
     return embed, None
 
 
+async def _prebuild_item_embed(item_name):
+    embed, _ = await _render_item_embed(item_name)
+    return embed if magic_shop.answered(item_name) else None
+
+
+lookup_embeds.register("item", _prebuild_item_embed)
+
+
 def calculate_average_damage(damage_string: str) -> float:
     """
     Calculate the average damage from a D&D damage string.
@@ -1,54 +1,140 @@
+from typing import NamedTuple, Dict
+
 from discord import Embed
 
 import system
-from utils import getLogger, join_list
+from system.embed_cache import lookup_embeds
+from utils import getLogger, join_list, truncate
+from utils.SearchIndex import SearchIndex
 
 logger = getLogger(__name__)
 
-quick_rules = system.load_json("generated/bookref-quick")
-
-sage_advice_compendium = {
-    k["name"]: k["entries"]
-    for i in system.load_json("book/book-sac")["data"][0]["entries"][2]["entries"][2:]
-    for j in i["entries"]
-    for k in j["entries"]
-}
-actions = {action["name"]: action for action in system.load_json("actions")["action"]}
-
-senses = system.load_json("senses")["sense"]
-conditions = system.load_json("conditionsdiseases")
 
-
-def generate_rule_embed(rule: str):
-    rule = rule.rstrip("...")
-
-    title = None
+class Rule(NamedTuple):
+    kind: str
+    title: str
+    data: dict | list
+
+
+def _build_rule_catalog(actions: dict) -> Dict[str, Rule]:
+    """Display name ("Kind: Name") -> Rule for everything /lookup rule can show."""
+    quick_rules = system.load_json("generated/bookref-quick")
+    sac = system.load_json("book/book-sac")
+    sage_advice_compendium = {
+        k["name"]: k["entries"]
+        for i in sac["data"][0]["entries"][2]["entries"][2:]
+        for j in i["entries"]
+        for k in j["entries"]
+    }
+    senses = system.load_json("senses")["sense"]
+    conditions = system.load_json("conditionsdiseases")
+
+    catalog = {}
+
+    def add(kind: str, name: str, data: dict | list):
+        catalog.setdefault(f"{kind}: {name}", Rule(kind, name, data))
+
+    for i in system.base_table["itemProperty"]:
+        for j in i.get("entries", []):
+            add("Property", j["name"], j)
+    for sense in senses:
+        add("Sense", sense["name"], sense)
+    for name, action in actions.items():
+        add("Action", name, action)
+    for key in ["condition", "status", "disease"]:
+        for condition in conditions[key]:
+            if condition["source"] in system.legal_sources:
+                add(key.capitalize(), condition["name"], condition)
+    for move in [
+        *quick_rules["data"]["bookref-quick"][4]["entries"][2]["entries"],
+        *quick_rules["data"]["bookref-quick"][4]["entries"][:2],
+    ]:
+        if isinstance(move, dict) and "name" in move:
+            add("Movement", move["name"], move)
+    for name, ruling in sage_advice_compendium.items():
+        add("SAC", system.strip_template(name), ruling)
+    return catalog
+
+
+def _build_tables() -> dict:
+    actions = {
+        action["name"]: action for action in system.load_json("actions")["action"]
+    }
+    return {"actions": actions, "rule_catalog": _build_rule_catalog(actions)}
+
+
+def _load() -> dict:
+    tables = system.derive(
+        "rules",
+        [
+            "items-base",
+            "actions",
+            "generated/bookref-quick",
+            "book/book-sac",
+            "senses",
+            "conditionsdiseases",
+        ],
+        _build_tables,
+    )
+    # the snapshot stores rules as plain lists
+    rule_catalog = {k: Rule(*v) for k, v in tables["rule_catalog"].items()}
+    return {
+        "actions": tables["actions"],
+        "action_index": SearchIndex(tables["actions"]),
+        "rule_catalog": rule_catalog,
+        "rule_index": SearchIndex(rule_catalog),
+        # autocomplete truncates long names, mostly sage advice questions
+        "truncated_rule_names": {
+            truncate(k, 100): k for k in rule_catalog if len(k) > 100
+        },
+    }
+
+
+catalog = system.Catalog("rules", _load)
+
+
+def __getattr__(name):
+    return getattr(catalog, name)
+
+
+def find_rule(rule: str) -> Rule | None:
+    rule_catalog = catalog.rule_catalog
+    name = catalog.truncated_rule_names.get(rule, rule)
+    if name in rule_catalog:
+        return rule_catalog[name]
+    # typed by hand rather than picked from autocomplete
+    name = rule.rstrip(".")
+    return next((v for k, v in rule_catalog.items() if k.startswith(name)), None)
+
+
+def generate_rule_embed(rule_name: str):
+    embed = lookup_embeds.get("rule", rule_name)
+    if embed is not None:
+        return {"embed": embed}
+    rendered = _render_rule_embed(rule_name)
+    if "embed" in rendered:
+        lookup_embeds.set("rule", rule_name, rendered["embed"])
+    return rendered
+
+
+def _render_rule_embed(rule_name: str):
+    rule = find_rule(rule_name)
+    if not rule:
+        return logger.err_msg(f"Rule {rule_name} not found.")
+
+    title = rule.title
     fields = []
     footer = None
-    if rule.startswith("SAC: "):
-        title, ruling = next(
-            (system.strip_template(k), v)
-            for (k, v) in sage_advice_compendium.items()
-            if system.strip_template(k).startswith(rule[len("SAC: ") :])
-        )
-        fields = system.handle_description_entries(None, ruling, name="")
+    if rule.kind == "SAC":
+        fields = system.handle_description_entries(None, rule.data, name="")
         footer = "Sage Advice Compendium"
 
-    elif rule.startswith("Property: "):
-        prop = next(
-            j
-            for i in system.base_table["itemProperty"]
-            if "entries" in i
-            for j in i["entries"]
-            if j["name"] == rule[len("Property: ") :]
-        )
-        title = prop["name"]
-        fields = system.handle_description_entries(None, prop["entries"], name="")
+    elif rule.kind == "Property":
+        fields = system.handle_description_entries(None, rule.data["entries"], name="")
         footer = "Property"
 
-    elif rule.startswith("Action: "):
-        title = rule.split(": ")[-1]
-        description = actions[title]
+    elif rule.kind == "Action":
+        description = rule.data
         times = [
             t
             if isinstance(t, str)
@@ -65,35 +151,13 @@ def generate_rule_embed(rule: str):
         ]
         footer = f"Action | {description['source']} {description['page']}"
 
-    elif rule.startswith("Sense: "):
-        sense = next(s for s in senses if s["name"] == rule[len("Sense: ") :])
-        title = sense["name"]
-        fields = system.handle_description_entries(None, sense["entries"], name="")
-        footer = f"Sense | {sense['source']} {sense['page']}"
-
-    elif any(rule.startswith(a) for a in {"Condition: ", "Status: ", "Disease: "}):
-        key_left = rule.split(": ")[0].lower()
-        key_right = rule.split(": ")[-1]
-        condition = next(s for s in conditions[key_left] if s["name"] == key_right)
-        title = condition["name"]
-        fields = system.handle_description_entries(None, condition["entries"], name="")
-        footer = f"Sense | {condition['source']} {condition['page']}"
-
-    elif rule.startswith("Movement: "):
-        move = next(
-            m
-            for m in [
-                *quick_rules["data"]["bookref-quick"][4]["entries"][2]["entries"],
-                *quick_rules["data"]["bookref-quick"][4]["entries"][:2],
-            ]
-            if isinstance(m, dict) and m["name"] == rule[len("Movement: ") :]
-        )
-        title = move["name"]
-        fields = system.handle_description_entries(None, move["entries"], name="")
-        footer = f"Sense | {move['source']} {move['page']}"
+    else:
+        # Sense, Condition, Status, Disease and Movement
+        fields = system.handle_description_entries(None, rule.data["entries"], name="")
+        footer = f"Sense | {rule.data['source']} {rule.data['page']}"
 
     if not title or not len(fields) or not footer:
-        return logger.err_msg(f"Rule {rule} not found.")
+        return logger.err_msg(f"Rule {rule_name} not found.")
 
     embed = Embed(title=title)
     for n, v, i in fields:
@@ -102,6 +166,9 @@ def generate_rule_embed(rule: str):
     return {"embed": embed}
 
 
+lookup_embeds.register("rule", lambda name: _render_rule_embed(name).get("embed"))
+
+
 lvl_to_xp = {
     1: 0,
     2: 300,
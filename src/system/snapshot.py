@@ -0,0 +1,172 @@
+"""
+Precompiled copy of the tables the system modules derive from the 5etools json, so a restart decodes one
+msgpack file instead of parsing and filtering every source again.
+
+Each table is stored alongside the sha256 of the json files it was built from and of the system package's
+code, and is rebuilt and written back whenever either changes. To build every table ahead of time:
+
+    python -m system.snapshot
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Any
+
+import msgspec
+
+from utils import getLogger
+
+logger = getLogger(__name__)
+
+# bump when the file layout below changes
+SNAPSHOT_FORMAT = 1
+
+
+class _Table(msgspec.Struct):
+    code: str
+    sources: Dict[str, str | None]
+    # kept encoded until first use, and so later in place edits to the live tables never get written back
+    data: msgspec.Raw
+
+
+class _SnapshotFile(msgspec.Struct):
+    format: int
+    # source -> (size, mtime_ns, sha256), so unchanged files aren't rehashed on every start
+    fingerprints: Dict[str, tuple[int, int, str]]
+    tables: Dict[str, _Table]
+
+
+class Snapshot:
+    def __init__(self, path: Path, data_dir: Path, code_dir: Path):
+        self.path = path
+        self.data_dir = data_dir
+        self.code_dir = code_dir
+        self._file: _SnapshotFile | None = None
+        self._code_hash: str | None = None
+        self._version: str | None = None
+        # catalogs load from the warm up thread and autocomplete workers at once. Never held while a table
+        # builds, a build can load another catalog, whose lock a thread waiting here might hold
+        self._lock = threading.RLock()
+
+    def _load(self) -> _SnapshotFile:
+        with self._lock:
+            if self._file is None:
+                self._file = _SnapshotFile(SNAPSHOT_FORMAT, {}, {})
+                try:
+                    snapshot = msgspec.msgpack.decode(
+                        self.path.read_bytes(), type=_SnapshotFile
+                    )
+                except FileNotFoundError:
+                    logger.info(f"{self.path.name} not found.")
+                except (msgspec.DecodeError, msgspec.ValidationError) as e:
+                    logger.warning(f"Ignoring unreadable {self.path.name}: {e}")
+                else:
+                    if snapshot.format == SNAPSHOT_FORMAT:
+                        self._file = snapshot
+            return self._file
+
+    def code_hash(self) -> str:
+        # computed once and never changes, a race just hashes twice
+        if self._code_hash is None:
+            h = hashlib.sha256()
+            for p in sorted(self.code_dir.glob("*.py")):
+                h.update(p.name.encode())
+                h.update(p.read_bytes())
+            self._code_hash = h.hexdigest()
+        return self._code_hash
+
+    def source_hash(self, source: str) -> str | None:
+        file = self.data_dir / f"{source}.json"
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            fingerprints = self._load().fingerprints
+            known = fingerprints.get(source)
+            if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+                return known[2]
+            with file.open("rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            fingerprints[source] = (stat.st_size, stat.st_mtime_ns, digest)
+            return digest
+
+    def version(self) -> str:
+        """
+        Short hash of the system code and of the json every snapshotted table reads, as those files are on disk
+        now, so it changes as soon as a source does even before the stale table is rebuilt.
+        """
+        with self._lock:
+            if self._version is None:
+                h = hashlib.sha256(self.code_hash().encode())
+                for name, table in sorted(self._load().tables.items()):
+                    h.update(name.encode())
+                    for source in sorted(table.sources):
+                        h.update(f"{source}={self.source_hash(source)}".encode())
+                self._version = h.hexdigest()[:16]
+            return self._version
+
+    def _fresh(self, table: _Table | None, sources: Iterable[str]) -> bool:
+        return (
+            table is not None
+            and table.code == self.code_hash()
+            and table.sources.keys() == set(sources)
+            and all(
+                (h := self.source_hash(s)) is not None and h == table.sources[s]
+                for s in sources
+            )
+        )
+
+    def derive(self, name: str, sources: Iterable[str], build: Callable[[], Any]):
+        """
+        The snapshot of table name if it is still fresh, otherwise build(), snapshotted for next time.
+        build must return msgpack encodable data, dict keys have to be strings.
+        """
+        sources = list(sources)
+        with self._lock:
+            table = self._load().tables.get(name)
+            if self._fresh(table, sources):
+                return msgspec.msgpack.decode(table.data)
+
+        start = time.perf_counter()
+        data = build()
+        logger.info(f"Built {name} in {time.perf_counter() - start:.3f}s")
+        try:
+            encoded = msgspec.msgpack.encode(data)
+        except TypeError as e:
+            logger.error(f"Could not snapshot {name}: {e}")
+            return data
+
+        with self._lock:
+            self._load().tables[name] = _Table(
+                self.code_hash(),
+                {s: self.source_hash(s) for s in sources},
+                msgspec.Raw(encoded),
+            )
+            self._version = None
+            try:
+                self.save()
+            except OSError as e:
+                logger.error(f"Could not save {self.path}: {e}")
+        # same shape as a snapshot hit, tuples come back as lists
+        return msgspec.msgpack.decode(encoded)
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_bytes(msgspec.msgpack.encode(self._load()))
+            os.replace(tmp, self.path)
+
+
+if __name__ == "__main__":
+    import system
+    from system.catalog import warm_up
+
+    warm_up()
+    logger.critical(
+        f"{system.data_snapshot.path} holds {len(system.data_snapshot._load().tables)} tables"
+    )
@@ -2,7 +2,9 @@ from discord import Embed
 
 import system
 from system import strip_template
+from system.embed_cache import lookup_embeds
 from utils import join_list, truncate
+from utils.SearchIndex import SearchIndex
 
 _schools_of_magic = {
     "T": "transmutation",
@@ -15,78 +17,115 @@ _schools_of_magic = {
     "D": "divination",
 }
 
-_all_spells = [
-    spell
-    for f in [
-        "spells/spells-ftd",
-        "spells/spells-xphb",
-        "spells/spells-tce",
-        "spells/spells-xge",
-        "spells/spells-bmt",
-    ]
-    for spell in system.load_json(f)["spell"]
+_spell_files = [
+    "spells/spells-ftd",
+    "spells/spells-xphb",
+    "spells/spells-tce",
+    "spells/spells-xge",
+    "spells/spells-bmt",
 ]
 
-spell_names = [spell["name"] for spell in _all_spells]
-_spell_target_data = system.load_json("spells/foundry")["spell"]
-_spell_source_lookups = system.load_json("generated/gendata-spell-source-lookup")
 
-_spells_to_class_data = {
-    k: v
-    for (source, spell_data) in _spell_source_lookups.items()
-    if source.upper() in system.legal_sources
-    for (k, v) in spell_data.items()
-}
+def _build_tables() -> dict:
+    spell_source_lookups = system.load_json("generated/gendata-spell-source-lookup")
+
+    spells_to_class_data = {
+        k: v
+        for (source, spell_data) in spell_source_lookups.items()
+        if source.upper() in system.legal_sources
+        for (k, v) in spell_data.items()
+    }
+
+    spells_to_classes = {
+        spell_name: [
+            c
+            for from_source in v.get("class", v.get("classVariant", {})).values()
+            for c in from_source
+            if from_source and c in system.legal_classes
+        ]
+        for (spell_name, v) in spells_to_class_data.items()
+    }
+
+    spells_to_subclasses = {
+        k: v
+        for (k, v) in {
+            spell_name: {
+                k: v
+                for (k, v) in {
+                    class_name: [
+                        subclass
+                        for (
+                            subclass_source,
+                            subclasss_by_source,
+                        ) in subclass_data.items()
+                        if subclass_source in system.legal_sources
+                        for subclass in subclasss_by_source.keys()
+                    ]
+                    for (class_source, subclasses_by_class) in spell_data[
+                        "subclass"
+                    ].items()
+                    if class_source in system.legal_sources
+                    for (class_name, subclass_data) in subclasses_by_class.items()
+                }.items()
+                if v
+            }
+            for (spell_name, spell_data) in spells_to_class_data.items()
+            if "subclass" in spell_data
+        }.items()
+        if v
+    }
+
+    # lowercase name -> foundry target data, first entry with a target wins
+    spell_targets = {}
+    for std in system.load_json("spells/foundry")["spell"]:
+        if "target.type" in std.get("system", {}):
+            spell_targets.setdefault(std["name"].lower(), std["system"])
+
+    return {
+        "all_spells": [
+            spell for f in _spell_files for spell in system.load_json(f)["spell"]
+        ],
+        "spell_targets": spell_targets,
+        "spells_to_classes": spells_to_classes,
+        "spells_to_subclasses": spells_to_subclasses,
+    }
 
-_spells_to_classes = {
-    spell_name: [
-        c
-        for from_source in v.get("class", v.get("classVariant", {})).values()
-        for c in from_source
-        if from_source and c in system.legal_classes
-    ]
-    for (spell_name, v) in _spells_to_class_data.items()
-}
 
-_spells_to_subclasses = {
-    k: v
-    for (k, v) in {
-        spell_name: {
-            k: v
-            for (k, v) in {
-                class_name: [
-                    subclass
-                    for (subclass_source, subclasss_by_source) in subclass_data.items()
-                    if subclass_source in system.legal_sources
-                    for subclass in subclasss_by_source.keys()
-                ]
-                for (class_source, subclasses_by_class) in spell_data[
-                    "subclass"
-                ].items()
-                if class_source in system.legal_sources
-                for (class_name, subclass_data) in subclasses_by_class.items()
-            }.items()
-            if v
-        }
-        for (spell_name, spell_data) in _spells_to_class_data.items()
-        if "subclass" in spell_data
-    }.items()
-    if v
-}
+def _load() -> dict:
+    tables = system.derive(
+        "spells",
+        [*_spell_files, "spells/foundry", "generated/gendata-spell-source-lookup"],
+        _build_tables,
+    )
+    all_spells = tables["all_spells"]
+    spell_names = [spell["name"] for spell in all_spells]
+
+    spells_by_level = {i: [] for i in range(10)}
+    for spell in all_spells:
+        spells_by_level[spell["level"]].append(spell["name"])
 
-spells_by_level = {i: [] for i in range(10)}
-for spell in _all_spells:
-    spells_by_level[spell["level"]].append(spell["name"])
+    return {
+        **tables,
+        "spell_names": spell_names,
+        "spell_name_index": SearchIndex(spell_names),
+        "spells_by_level": spells_by_level,
+        "spells_by_name": {s["name"]: s for s in all_spells},
+    }
 
-spells_by_name = {s["name"]: s for s in _all_spells}
+
+catalog = system.Catalog("spells", _load)
+
+
+def __getattr__(name):
+    return getattr(catalog, name)
 
 
 def _get_spell_users(spell_name):
     s = spell_name.lower()
-    classes = _spells_to_classes.get(s, [])
+    classes = catalog.spells_to_classes.get(s, [])
     subclass = [
         f"{class_name} ({subclass_name})"
-        for (class_name, subclasses) in _spells_to_subclasses.get(s, {}).items()
+        for (class_name, subclasses) in catalog.spells_to_subclasses.get(s, {}).items()
         if class_name not in classes
         for subclass_name in subclasses
     ]
@@ -109,7 +148,15 @@ def st_nd_rd_th(i: int):
 
 
 def generate_spell_embed(spell_name):
-    s = next(s for s in _all_spells if s["name"] == spell_name)
+    embed = lookup_embeds.get("spell", spell_name)
+    if embed is None:
+        embed = _render_spell_embed(spell_name)
+        lookup_embeds.set("spell", spell_name, embed)
+    return embed
+
+
+def _render_spell_embed(spell_name):
+    s = next(s for s in catalog.all_spells if s["name"] == spell_name)
     classes = ", ".join(_get_spell_users(s["name"]))
     embed = Embed(title=spell_name)
 
@@ -131,15 +178,7 @@ def generate_spell_embed(spell_name):
         " ",
     )
 
-    target_data = next(
-        (
-            std["system"]
-            for std in _spell_target_data
-            if s["name"].lower() == std["name"].lower()
-            and "target.type" in std.get("system", {})
-        ),
-        None,
-    )
+    target_data = catalog.spell_targets.get(s["name"].lower())
 
     if target_data:
         target_string = " ".join(
@@ -198,3 +237,6 @@ def generate_spell_embed(spell_name):
     embed.set_footer(text=f"Spell | {s['source']} {s['page']}")
 
     return embed
+
+
+lookup_embeds.register("spell", _render_spell_embed)
@@ -0,0 +1,58 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency that keeps failing. After threshold consecutive failures the circuit opens and
+    allow() is false for cooldown seconds, then a single trial call is let through: its success closes the circuit,
+    its failure opens it for another cooldown.
+    """
+
+    def __init__(self, name: str, threshold: int, cooldown: float):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self._trial else "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if not self._trial and time.monotonic() - self.opened_at >= self.cooldown:
+            self._trial = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, success: bool) -> None:
+        """Report the outcome of a call allow() let through."""
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+            return
+
+        self.failures += 1
+        if self._trial or (self.opened_at is None and self.failures >= self.threshold):
+            self.opened_at = time.monotonic()
+            self._trial = False
+            self.trips += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "threshold": self.threshold,
+            "cooldown": self.cooldown,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Callable, Dict, Hashable, Any
+
+from utils.TtlLruCache import TtlLruCache
+
+# upper bounds in milliseconds, anything slower lands in the final "+Inf" bucket
+latency_buckets_ms = (5, 10, 25, 50, 100, 250, 500, 1000, 2000, 3000)
+
+
+class CallbackStats:
+    """Latency and failure counters for one callback."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency_counts = [0] * (len(latency_buckets_ms) + 1)
+        self.calls = 0
+        self.timeouts = 0
+        self.stale = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.latency_total += seconds
+            self.latency_max = max(self.latency_max, seconds)
+            self._latency_counts[bisect_left(latency_buckets_ms, seconds * 1000)] += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            # cumulative like Prometheus buckets, le_inf always equals calls
+            cumulative = list(accumulate(self._latency_counts))
+            return {
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "stale_served": self.stale,
+                "errors": self.errors,
+                "latency_avg_ms": round(self.latency_total * 1000 / self.calls, 3)
+                if self.calls
+                else 0,
+                "latency_max_ms": round(self.latency_max * 1000, 3),
+                "latency_histogram": {
+                    **{f"le_{b}ms": c for b, c in zip(latency_buckets_ms, cumulative)},
+                    "le_inf": cumulative[-1],
+                },
+            }
+
+
+class DeadlineExecutor:
+    """
+    Runs callbacks under a time budget. Sync callbacks run in a thread so they can't stall the event loop.
+    When the budget runs out, or the callback fails, the caller gets the last good result for the same key
+    while the callback keeps running and refreshes it for next time.
+    """
+
+    def __init__(
+        self,
+        budget: float,
+        results: TtlLruCache,
+        key: Callable[..., Hashable],
+        fallback: Any = None,
+    ):
+        self.budget = budget
+        self.results = results
+        self.key = key
+        self.fallback = fallback
+        self.stats: Dict[str, CallbackStats] = {}
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+
+    def wrap(self, fn: Callable) -> Callable:
+        name = fn.__name__
+        stats = self.stats.setdefault(name, CallbackStats())
+
+        @functools.wraps(fn)
+        async def wrapper(*args):
+            key = (name, self.key(*args))
+            # a retried keystroke joins the run that is already in flight
+            task = self._pending.get(key)
+            if task is None:
+                task = asyncio.create_task(self._run(fn, args, key, stats))
+                self._pending[key] = task
+                task.add_done_callback(lambda t: self._done(key, t))
+
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), self.budget)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+            except Exception:
+                stats.errors += 1
+                if self.results.get(key) is TtlLruCache.MISS:
+                    raise
+
+            stale = self.results.get(key)
+            if stale is TtlLruCache.MISS:
+                return self.fallback
+            stats.stale += 1
+            return stale
+
+        return wrapper
+
+    async def _run(self, fn: Callable, args: tuple, key: Hashable, stats: CallbackStats):
+        start = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn(*args)
+            else:
+                result = await asyncio.to_thread(fn, *args)
+        finally:
+            stats.record(time.perf_counter() - start)
+        self.results.set(key, result)
+        return result
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        self._pending.pop(key, None)
+        if not task.cancelled():
+            # retrieved here so a run that outlived its caller doesn't log "exception was never retrieved"
+            task.exception()
+
+    def to_dict(self) -> dict:
+        return {
+            "budget_ms": round(self.budget * 1000),
+            "callbacks": {name: s.to_dict() for name, s in self.stats.items()},
+        }
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import os
+from io import BytesIO
+from typing import Dict
+
+import httpx
+from PIL import Image
+
+from utils import getLogger, is_url
+from utils.TtlLruCache import TtlLruCache
+
+logger = getLogger(__name__)
+
+# image formats by the first bytes of the file, anything else is dropped before it finishes downloading
+_signatures = {
+    b"\x89PNG\r\n\x1a\n": "PNG",
+    b"\xff\xd8\xff": "JPEG",
+    b"GIF87a": "GIF",
+    b"GIF89a": "GIF",
+    b"BM": "BMP",
+    b"II*\x00": "TIFF",
+    b"MM\x00*": "TIFF",
+}
+# formats Discord takes as an event cover, the others are transcoded
+_cover_formats = {"PNG", "JPEG", "GIF", "WEBP"}
+
+
+def _sniff(head: bytes) -> str | None:
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return next((f for sig, f in _signatures.items() if head.startswith(sig)), None)
+
+
+class ImageFetcher:
+    """
+    Downloads event cover images without blocking the event loop. Responses are streamed and dropped as soon as
+    they exceed max_bytes or don't start like an image, then fit to cover_size and cover_bytes in a worker thread.
+    Covers are cached by the sha256 of the download, and urls by the hash they served, so editing a session again
+    reuses the bytes rather than fetching and converting them again.
+    """
+
+    # room for Discord's recommended 800x320 cover on high density screens
+    cover_size = (1600, 640)
+    # plenty for a cover that size, and keeps the covers cache to at most 16 * 2 MiB in memory
+    cover_bytes = 2 * 1024 * 1024
+
+    def __init__(self, max_bytes: int, timeout: float):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        # url -> content hash, None for urls that didn't serve a usable image
+        self.urls = TtlLruCache("image_urls", maxsize=1024, ttl=60 * 60)
+        # content hash -> cover bytes
+        self.covers = TtlLruCache("image_covers", maxsize=16, ttl=60 * 60)
+        self._client: httpx.AsyncClient | None = None
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, follow_redirects=True, max_redirects=5
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_image_bytes(self, url: str | None) -> bytes | None:
+        """Cover image bytes for url, or None when it isn't a reachable image."""
+        if not url or not is_url(url):
+            return None
+
+        digest = self.urls.get(url)
+        if digest is None:
+            return None
+        if digest is not TtlLruCache.MISS:
+            cover = self.covers.get(digest)
+            if cover is not TtlLruCache.MISS:
+                return cover
+
+        task = self._pending.get(url)
+        if task is None:
+            task = asyncio.create_task(self._fetch(url))
+            self._pending[url] = task
+            task.add_done_callback(lambda _: self._pending.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str) -> bytes | None:
+        data = await self._download(url)
+        if data is None:
+            # a fixed image is usually uploaded under a new url, but don't hold on to failures for long
+            self.urls.set(url, None, ttl=60)
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        cover = self.covers.get(digest)
+        if cover is TtlLruCache.MISS:
+            cover = await asyncio.to_thread(self._fit_cover, data)
+            if cover is None:
+                self.urls.set(url, None, ttl=60)
+                return None
+            self.covers.set(digest, cover)
+        self.urls.set(url, digest)
+        return cover
+
+    async def _download(self, url: str) -> bytes | None:
+        try:
+            async with self._get_client().stream("GET", url) as response:
+                if not response.is_success:
+                    logger.info(f"{response.status_code} fetching image {url}")
+                    return None
+                length = response.headers.get("Content-Length", "")
+                if length.isdigit() and int(length) > self.max_bytes:
+                    logger.info(f"Image {url} is {length} bytes, over the cap")
+                    return None
+
+                data = bytearray()
+                sniffed = False
+                async for chunk in response.aiter_bytes():
+                    data += chunk
+                    if not sniffed and len(data) >= 12:
+                        if not _sniff(data):
+                            logger.info(f"{url} is not a supported image")
+                            return None
+                        sniffed = True
+                    if len(data) > self.max_bytes:
+                        logger.info(f"Image {url} is over {self.max_bytes} bytes")
+                        return None
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            logger.info(f"Could not fetch image {url}: {e!r}")
+            return None
+        return bytes(data) if _sniff(data) else None
+
+    def _fit_cover(self, data: bytes) -> bytes | None:
+        """data as is if Discord can use it as a cover, otherwise scaled down and re-encoded. Blocking."""
+        try:
+            with Image.open(BytesIO(data)) as image:
+                fits = (
+                    image.width <= self.cover_size[0]
+                    and image.height <= self.cover_size[1]
+                )
+                # scaling an animated gif would keep only its first frame
+                if (
+                    image.format in _cover_formats
+                    and len(data) <= self.cover_bytes
+                    and (fits or getattr(image, "is_animated", False))
+                ):
+                    return data
+
+                image.thumbnail(self.cover_size)
+                out = BytesIO()
+                if image.mode in ("RGBA", "LA", "P", "PA"):
+                    image.save(out, "PNG", optimize=True)
+                if not out.tell() or out.tell() > self.cover_bytes:
+                    # photos saved as png easily outgrow cover_bytes, jpeg drops transparency but fits
+                    out = BytesIO()
+                    image.convert("RGB").save(out, "JPEG", quality=85)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.info(f"Unreadable image: {e}")
+            return None
+
+        if out.tell() > self.cover_bytes:
+            return None
+        return out.getvalue()
+
+
+image_fetcher = ImageFetcher(
+    int(os.getenv("IMAGE_FETCH_MAX_BYTES", 20 * 1024 * 1024)),
+    float(os.getenv("IMAGE_FETCH_TIMEOUT", 10)),
+)
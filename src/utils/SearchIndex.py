@@ -0,0 +1,134 @@
+import difflib
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, Callable, List, Dict, Set
+
+
+def shortest_first(out: List[str]) -> List[str]:
+    return sorted(sorted(out), key=len)
+
+
+def _trigrams(s: str) -> Set[str]:
+    return {s[i : i + 3] for i in range(len(s) - 2)}
+
+
+class SearchIndex:
+    """
+    Autocomplete search over a fixed list of strings, indexed once up front.
+    Ranks like the linear search it replaced: case insensitive prefix matches (case sensitive ones preferred),
+    then entries containing every word, then the closest by difflib ratio. Short result lists are topped up with
+    the closest matches.
+    """
+
+    max_results = 25
+    min_results = 5
+    # fuzzy matching only scores this many entries, the ones sharing the most trigrams with the input
+    fuzzy_candidates = 250
+
+    def __init__(self, source: Iterable[str]):
+        self.source: List[str] = list(source)
+        self._folded = [s.casefold() for s in self.source]
+        self._sorted = sorted(range(len(self._folded)), key=self._folded.__getitem__)
+        self._sorted_keys = [self._folded[i] for i in self._sorted]
+        self._postings: Dict[str, Set[int]] = {}
+        for i, folded in enumerate(self._folded):
+            for trigram in _trigrams(folded):
+                self._postings.setdefault(trigram, set()).add(i)
+
+    def __len__(self):
+        return len(self.source)
+
+    def _starts_with(self, prefix: str) -> List[int]:
+        matches = []
+        for k in range(bisect_left(self._sorted_keys, prefix), len(self._sorted_keys)):
+            if not self._sorted_keys[k].startswith(prefix):
+                break
+            matches.append(self._sorted[k])
+        return sorted(matches)
+
+    def _contains_all(self, words: List[str], limit: int) -> List[int]:
+        postings = []
+        for word in words:
+            for trigram in _trigrams(word):
+                if trigram not in self._postings:
+                    return []
+                postings.append(self._postings[trigram])
+
+        if postings:
+            postings.sort(key=len)
+            candidates = sorted(postings[0].intersection(*postings[1:]))
+        else:
+            # every word is shorter than a trigram
+            candidates = range(len(self.source))
+
+        matches = []
+        for i in candidates:
+            if all(word in self._folded[i] for word in words):
+                matches.append(i)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def _closest(self, user_input: str, n: int) -> List[str]:
+        """difflib.get_close_matches(user_input, source, n, cutoff=0), bounded to the likeliest candidates."""
+        candidates = self.source
+        if len(self.source) > self.fuzzy_candidates:
+            overlap = Counter()
+            for trigram in _trigrams(user_input.casefold()):
+                overlap.update(self._postings.get(trigram, ()))
+            if overlap:
+                candidates = [
+                    self.source[i]
+                    for i, _ in overlap.most_common(self.fuzzy_candidates)
+                ]
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(user_input)
+        scored = []
+        for candidate in candidates:
+            matcher.set_seq1(candidate)
+            scored.append((matcher.ratio(), candidate))
+        return [candidate for _, candidate in heapq.nlargest(n, scored)]
+
+    def search(
+        self,
+        user_input: str,
+        sort_fun: Callable[[List[str]], List[str]] | None = shortest_first,
+    ) -> List[str]:
+        if not self.source:
+            return []
+        elif not user_input:
+            out = list(self.source)
+        else:
+            out = []
+            folded = user_input.casefold()
+
+            starts_with = [self.source[i] for i in self._starts_with(folded)]
+            if starts_with:
+                out = [s for s in starts_with if s.startswith(user_input)] or starts_with
+            else:
+                contains = [
+                    self.source[i]
+                    for i in self._contains_all(folded.split(" "), self.max_results)
+                ]
+                if contains:
+                    words = user_input.split(" ")
+                    out = [
+                        s for s in contains if all(word in s for word in words)
+                    ] or contains
+                elif sort_fun:
+                    sort_fun = None
+                    out = self._closest(user_input, self.max_results)
+
+        if len(out) < self.min_results:
+            seen = set(out)
+            for o in self._closest(user_input, self.min_results):
+                if o not in seen:
+                    out.append(o)
+                    seen.add(o)
+                if len(out) == self.min_results:
+                    break
+        if sort_fun:
+            out = sort_fun(out)
+        return out[: self.max_results]
@@ -28,7 +28,7 @@ class WikiJsTaskQueue:
         """Enqueue a coroutine (callable returning an awaitable)."""
         if self._instance._valid:
             await self._queue.put((coro, args, kwargs))
-            logger.warning(f"{len(self._queue)} {coro=} {args=} {kwargs=}")
+            logger.warning(f"{self._queue.qsize()} {coro=} {args=} {kwargs=}")
 
     async def _worker(self) -> None:
         """Background worker that pulls tasks from the queue and launches them."""
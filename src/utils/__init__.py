@@ -5,20 +5,18 @@ import os
 import platform
 import re
 from datetime import datetime
-from io import BytesIO
 from logging import Logger
+from pathlib import Path
 from typing import List, Tuple, Optional
 from urllib.parse import urlparse
 
 import aiohttp
 import dateparser
-import httpx
 import numpy as np
 import pytz
 import pytzdata
 import tabulate as tabulate_lib
 import uvicorn.logging
-from PIL import Image
 from discord import (
     Thread,
     Role,
@@ -33,6 +31,8 @@ from discord import (
 
 from discord.abc import GuildChannel
 
+from utils.SearchIndex import SearchIndex
+
 disord_token_url = "https://discord.com/api/oauth2/token"
 
 oronder_server_id = 860520082697617468
@@ -55,6 +55,8 @@ oronder_bot_test = 1148024288973160529
 oronder_bot_dev = 1126179973284237374
 
 log_level = os.getenv("LOG_LEVEL", "INFO")
+# snapshots and caches kept across deploys. Not data/, the 5etools json there is refetched by every new container
+cache_dir = Path.cwd() / "cache"
 
 
 class OronderLogger(Logger):
@@ -91,6 +93,7 @@ timezones: List[str] = [
     *[t for t in pytzdata.timezones if t.split("/")[0] == "US"],
     *[t for t in pytzdata.timezones if t.split("/")[0] != "US"],
 ]
+timezone_index = SearchIndex(timezones)
 
 time_format = "%m/%d/%Y %I:%M %p"
 
@@ -196,17 +199,6 @@ def is_url(url):
         return False
 
 
-def get_image_bytes(url: str | None) -> bytes | None:
-    image_bytes = None
-    if url and is_url(url):
-        try:
-            image_bytes = httpx.get(url).content
-            Image.open(BytesIO(image_bytes))
-        except Exception:
-            image_bytes = None
-    return image_bytes
-
-
 def err_msg(msg, guild_id: int | None = None):
     logger.error(f"{guild_id}: {msg}" if guild_id else msg)
     return {"content": msg, "ephemeral": True}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Optional, Tuple, Callable
 
 import d20
@@ -176,15 +177,15 @@ class DowntimeBuyView(View):
                 button.style = ButtonStyle.gray
 
         self.disable_all_items()
+        # pricing the items can take longer than the 3s Discord gives to answer an interaction
+        await interaction.response.defer()
 
         item_count_roll_string = "1d6" if table_letter == "A" else "1d4"
         if self.main_item_found:
             item_count_roll_string += "-1"
         item_count_roll = d20.roll(item_count_roll_string)
 
-        item_table = next(
-            i for i in items.loot_table["magicItems"] if i["type"] == table_letter
-        )["table"]
+        item_table = items.magic_item_tables[table_letter]
         rolls = [d20.roll("1d100").total for _ in range(item_count_roll.total)]
         rolled_items = [
             next(
@@ -201,16 +202,20 @@ class DowntimeBuyView(View):
             value=f"*{item_count_roll} items from Magic Item Table {table_letter}*",
         )
 
-        for rolled_item in rolled_items:
+        def is_consumable(rolled_item: str) -> bool:
             item_actual, _ = items.get_item(rolled_item)
-            consumable = (item_actual and item_actual["consumable"]) or any(
+            return bool(item_actual and item_actual["consumable"]) or any(
                 i in rolled_item.lower() for i in ["potion", "scroll"]
             )
-            embed.add_field(
-                name=rolled_item,
-                value=get_item_price_string(rolled_item, consumable),
-                inline=False,
-            )
+
+        price_strings = await asyncio.gather(
+            *[
+                get_item_price_string(rolled_item, is_consumable(rolled_item))
+                for rolled_item in rolled_items
+            ]
+        )
+        for rolled_item, price_string in zip(rolled_items, price_strings):
+            embed.add_field(name=rolled_item, value=price_string, inline=False)
 
         embed.add_field(
             name="Complications", value=str(d20.roll("1d100")), inline=False
@@ -220,7 +225,7 @@ class DowntimeBuyView(View):
             # TODO icon_url=interaction.user.avatar.url
         )
 
-        await interaction.response.edit_message(view=self, embed=embed)
+        await interaction.edit_original_response(view=self, embed=embed)
         await gm_downtime_logic(interaction, embed)
 
 
@@ -288,7 +293,7 @@ class DowntimeGmButton(Button):
 
 
 async def gm_downtime_logic(interaction: Interaction, embed: Embed):
-    guild_settings = GuildSettingsTable.lookup(interaction.guild_id)
+    guild_settings = await GuildSettingsTable.lookup(interaction.guild_id)
     if (
         not guild_settings.downtime_gm_channel_id
         or guild_settings.downtime_channel_id == guild_settings.downtime_gm_channel_id
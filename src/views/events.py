@@ -5,7 +5,7 @@ from discord import ButtonStyle, Interaction, ScheduledEvent
 from discord.ui import View, Button
 
 from database.missions import edit_mission
-from models.actor import Actor
+from models.actor import ActorSummary
 from models.missions import Mission
 from utils import getLogger
 
@@ -22,7 +22,7 @@ class CharacterSelectView(View):
         event: ScheduledEvent,
         initiator: int,
         mission: Mission,
-        actors: List[Actor],
+        actors: List[ActorSummary],
     ):
         self.event = event
         self.initiator = initiator
@@ -32,10 +32,10 @@ class CharacterSelectView(View):
 
 
 class CharacterSelectButton(Button):
-    actor: Actor
+    actor: ActorSummary
     parent: CharacterSelectView
 
-    def __init__(self, actor: Actor, parent: CharacterSelectView):
+    def __init__(self, actor: ActorSummary, parent: CharacterSelectView):
         self.actor = actor
         self.parent = parent
         super().__init__(label=actor.name, style=ButtonStyle.primary)
@@ -27,10 +27,10 @@ from utils import (
     format_time,
     OronderLogger,
     parse_time,
-    get_image_bytes,
     check_permissions,
     getLogger,
 )
+from utils.ImageFetcher import image_fetcher
 
 logger = getLogger(__name__)
 
@@ -171,7 +171,7 @@ class ScheduleModal(Modal):
                 return
 
         self.mission.image_url = self.children[3].value
-        image_bytes = get_image_bytes(self.mission.image_url)
+        image_bytes = await image_fetcher.get_image_bytes(self.mission.image_url)
         if self.mission.image_url and not image_bytes:
             await self.handle_error(
                 f"{self.mission.image_url} is not a valid image url.", interaction
@@ -271,7 +271,7 @@ class ScheduleModal(Modal):
             await self.handle_error(scheduled_event_error, interaction)
             return
 
-        create_mission_errors = upsert_mission(
+        create_mission_errors = await upsert_mission(
             interaction.guild,
             self.mission,
             add_event_fun=self.mission_event_manager.upsert,